@@ -4,11 +4,10 @@ Implementa predicciones recursivas día por día actualizando lags.
 """
 
 import streamlit as st
-import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
+import os
 import sys
 import joblib
 import warnings
@@ -18,7 +17,23 @@ warnings.filterwarnings('ignore')
 # Obtener la ruta base del proyecto (parent del directorio app)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 MODEL_PATH = PROJECT_ROOT / "models" / "modelo_final.joblib"
+DIRECT_MODEL_PATH = PROJECT_ROOT / "models" / "modelo_directo.joblib"
 DATA_PATH = PROJECT_ROOT / "data" / "processed" / "inferencia_df_transformado.csv"
+TRAIN_DATA_PATH = PROJECT_ROOT / "data" / "processed" / "df.csv"
+STORE_PATH = PROJECT_ROOT / "data" / "store"
+
+# Exportación opcional de métricas (.prom: texto Prometheus, otro: JSON Lines)
+METRICS_PATH = os.environ.get("FORECASTING_METRICS_PATH")
+
+# Añadir el directorio del proyecto al path
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.data_store import ensure_data_store, list_products, read_data_store
+from src.forecasting import TARGET_COLUMN, compute_holdout_residuals, make_forecast, simulate_forecast_bands
+from src.hierarchy import aggregate_forecast_frame, build_hierarchy
+from src.utils import count, metrics, setup_logger, timed
+
+logger = setup_logger(__name__)
 
 # Verificar que las rutas existen
 if not MODEL_PATH.exists():
@@ -62,118 +77,112 @@ st.markdown("""
 @st.cache_resource
 def load_model():
     """Carga el modelo entrenado."""
+    count('cache_misses', stage='app.load_model')
     try:
-        model = joblib.load(str(MODEL_PATH))
+        with timed('load.model'):
+            model = joblib.load(str(MODEL_PATH))
         return model
     except Exception as e:
         st.error(f"❌ Error al cargar el modelo: {e}")
         return None
 
+@st.cache_resource
+def load_direct_model():
+    """Carga el modelo de predicción directa si está disponible."""
+    count('cache_misses', stage='app.load_direct_model')
+    if not DIRECT_MODEL_PATH.exists():
+        return None
+    try:
+        with timed('load.direct_model'):
+            return joblib.load(str(DIRECT_MODEL_PATH))
+    except Exception as e:
+        st.warning(f"⚠️ No se pudo cargar el modelo directo: {e}")
+        return None
+
+@st.cache_resource
+def load_data_store():
+    """Abre el almacén particionado de inferencia (en memoria si no se puede escribir en disco)."""
+    count('cache_misses', stage='app.load_data_store')
+    try:
+        with timed('load.data_store'):
+            return ensure_data_store(DATA_PATH, STORE_PATH / "inferencia", fallback_to_memory=True)
+    except Exception as e:
+        st.error(f"❌ Error al cargar los datos: {e}")
+        return None
+
 @st.cache_data
-def load_inference_data():
-    """Carga los datos de inferencia de noviembre 2025."""
+def load_inference_data(_store):
+    """Carga los datos de inferencia de noviembre 2025 de todo el catálogo."""
+    count('cache_misses', stage='app.load_inference_data')
     try:
-        df = pd.read_csv(str(DATA_PATH))
-        df['fecha'] = pd.to_datetime(df['fecha'])
-        return df
+        with timed('load.inference_data'):
+            return read_data_store(_store)
     except Exception as e:
         st.error(f"❌ Error al cargar los datos: {e}")
         return None
 
-def get_unique_products(df):
-    """Extrae los productos únicos del dataframe."""
-    return sorted(df['nombre'].unique().tolist())
+@st.cache_resource
+def load_hierarchy(_store):
+    """Construye la jerarquía producto → subcategoría → categoría del catálogo."""
+    count('cache_misses', stage='app.load_hierarchy')
+    return build_hierarchy(read_data_store(_store, columns=['producto_id', 'subcategoria', 'categoria']))
+
+def cached_call(stage, loader, *args):
+    """Llama a una función cacheada y cuenta un acierto si no se ejecutó."""
+    misses = metrics.get('cache_misses', stage)
+    result = loader(*args)
+    if metrics.get('cache_misses', stage) == misses:
+        count('cache_hits', stage=stage)
+    return result
 
-def prepare_product_data(df, product_name):
-    """Prepara los datos para un producto específico."""
-    product_df = df[df['nombre'] == product_name].copy()
-    product_df = product_df.sort_values('fecha').reset_index(drop=True)
-    return product_df
+def export_metrics():
+    """Exporta las métricas acumuladas si FORECASTING_METRICS_PATH está definido."""
+    if not METRICS_PATH:
+        return
+    try:
+        if METRICS_PATH.endswith('.prom'):
+            Path(METRICS_PATH).write_text(metrics.to_prometheus(), encoding='utf-8')
+        else:
+            metrics.write_json_line(METRICS_PATH)
+    except OSError as e:
+        logger.warning(f"No se pudieron exportar las métricas: {e}")
 
-def update_lags(row, previous_prediction, lag_values):
-    """Actualiza los valores de lag para la predicción recursiva."""
-    row['unidades_vendidas_lag7'] = lag_values['lag6']
-    row['unidades_vendidas_lag6'] = lag_values['lag5']
-    row['unidades_vendidas_lag5'] = lag_values['lag4']
-    row['unidades_vendidas_lag4'] = lag_values['lag3']
-    row['unidades_vendidas_lag3'] = lag_values['lag2']
-    row['unidades_vendidas_lag2'] = lag_values['lag1']
-    row['unidades_vendidas_lag1'] = previous_prediction
-    return row
+def get_unique_products(store):
+    """Extrae los productos únicos del índice del almacén (ya ordenados)."""
+    return list_products(store)
 
-def update_moving_average(recent_predictions, window=7):
-    """Calcula la media móvil de las últimas predicciones."""
-    if len(recent_predictions) < window:
-        return np.mean(recent_predictions) if recent_predictions else 0
-    return np.mean(recent_predictions[-window:])
+def prepare_product_data(store, product_name):
+    """Lee del almacén solo las filas de un producto, ordenadas por fecha."""
+    return read_data_store(store, names=[product_name])
 
-def make_recursive_predictions(model, df, discount_adjustment, competition_scenario):
+@st.cache_data
+def load_residuals(_model):
+    """Calcula residuos fuera de muestra (último año reservado) por producto para Monte Carlo."""
+    count('cache_misses', stage='app.load_residuals')
+    try:
+        with timed('load.residuals'):
+            train_store = ensure_data_store(TRAIN_DATA_PATH, STORE_PATH / "entrenamiento", fallback_to_memory=True)
+            columns = list(dict.fromkeys(['producto_id', 'año', *_model.feature_names_in_, TARGET_COLUMN]))
+            return compute_holdout_residuals(_model, read_data_store(train_store, columns=columns))
+    except Exception as e:
+        st.error(f"❌ Error al calcular los residuos: {e}")
+        return None
+
+def make_recursive_predictions(model, df, discount_adjustment, competition_scenario, strategy='recursive'):
     """
-    Realiza predicciones recursivas día por día actualizando los lags.
+    Realiza predicciones día por día (recursivas o directas).
     
     Args:
-        model: Modelo entrenado
+        model: Modelo entrenado para la estrategia elegida
         df: DataFrame preparado para un producto (noviembre)
         discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
         competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        strategy: 'recursive' (lags actualizados día a día) o 'direct'
     
     Returns:
         DataFrame con predicciones
     """
-    df = df.copy()
-    
-    # Ajustar precios según los controles
-    df['precio_venta'] = df['precio_base'] * (1 + discount_adjustment / 100)
-    
-    # Ajustar precio de competencia según el escenario
-    precio_competencia_base = df['precio_competencia'].copy()
-    if competition_scenario == 'lower':
-        df['precio_competencia'] = precio_competencia_base * 0.95
-    elif competition_scenario == 'higher':
-        df['precio_competencia'] = precio_competencia_base * 1.05
-    
-    # Recalcular variables de precio
-    df['descuento_porcentaje'] = ((df['precio_venta'] - df['precio_base']) / df['precio_base']) * 100
-    df['ratio_precio'] = df['precio_venta'] / df['precio_competencia']
-    
-    # Obtener feature names del modelo
-    feature_names = model.feature_names_in_
-    
-    predictions = []
-    recent_predictions = []
-    
-    for idx, row in df.iterrows():
-        # Para el primer día, usar los lags del archivo
-        if idx > 0:
-            # Preparar lags para los días siguientes
-            lag_values = {
-                'lag1': df.loc[idx-1, 'unidades_vendidas_lag1'],
-                'lag2': df.loc[idx-1, 'unidades_vendidas_lag2'],
-                'lag3': df.loc[idx-1, 'unidades_vendidas_lag3'],
-                'lag4': df.loc[idx-1, 'unidades_vendidas_lag4'],
-                'lag5': df.loc[idx-1, 'unidades_vendidas_lag5'],
-                'lag6': df.loc[idx-1, 'unidades_vendidas_lag6'],
-            }
-            df.loc[idx] = update_lags(row, predictions[-1], lag_values)
-            
-            # Actualizar media móvil
-            df.loc[idx, 'unidades_vendidas_media_movil_7d'] = update_moving_average(
-                recent_predictions, window=7
-            )
-        
-        # Preparar features para la predicción
-        X = df.loc[[idx], feature_names].copy()
-        
-        # Hacer predicción
-        pred = model.predict(X)[0]
-        pred = max(0, pred)  # No permitir predicciones negativas
-        predictions.append(pred)
-        recent_predictions.append(pred)
-    
-    df['prediccion_unidades'] = predictions
-    df['ingresos_proyectados'] = df['prediccion_unidades'] * df['precio_venta']
-    
-    return df
+    return make_forecast(model, df, discount_adjustment, competition_scenario, strategy)
 
 def format_currency(value):
     """Formatea un valor como moneda en euros."""
@@ -185,12 +194,13 @@ def format_units(value):
 
 # ==================== APLICACIÓN PRINCIPAL ====================
 
-def main():
+def render_app():
     # Cargar modelo y datos
-    model = load_model()
-    df = load_inference_data()
+    model = cached_call('app.load_model', load_model)
+    direct_model = cached_call('app.load_direct_model', load_direct_model)
+    store = cached_call('app.load_data_store', load_data_store)
     
-    if model is None or df is None:
+    if model is None or store is None:
         st.error("No se pudieron cargar los componentes necesarios.")
         return
     
@@ -200,7 +210,7 @@ def main():
         st.divider()
         
         # Selector de producto
-        products = get_unique_products(df)
+        products = get_unique_products(store)
         selected_product = st.selectbox(
             "📦 Selecciona Producto",
             products,
@@ -241,6 +251,46 @@ def main():
         
         st.divider()
         
+        # Estrategia de predicción
+        strategy = 'recursive'
+        if direct_model is not None:
+            st.markdown("**🧭 Estrategia de Predicción**")
+            strategy_label = st.radio(
+                "Elige estrategia:",
+                ["Recursiva", "Directa"],
+                help="Recursiva: lags actualizados día a día. Directa: horizonte como feature, sin dependencia entre días"
+            )
+            strategy = 'direct' if strategy_label == "Directa" else 'recursive'
+            st.divider()
+        
+        forecast_model = direct_model if strategy == 'direct' else model
+        
+        # Simulación Monte Carlo de incertidumbre
+        st.markdown("**🎲 Incertidumbre**")
+        show_uncertainty = st.checkbox(
+            "Mostrar bandas P10-P90",
+            value=False,
+            disabled=strategy != 'recursive',
+            help="Simula trayectorias perturbadas con los residuos históricos del modelo"
+        ) and strategy == 'recursive'
+        n_paths = st.select_slider(
+            "Número de trayectorias",
+            options=[100, 250, 500, 1000],
+            value=500,
+            disabled=not show_uncertainty
+        )
+        
+        st.divider()
+        
+        # Totales por categoría del catálogo completo
+        show_hierarchy = st.checkbox(
+            "🗂️ Totales por categoría",
+            value=False,
+            help="Predice todo el catálogo con el mismo escenario y agrega por categoría y subcategoría"
+        )
+        
+        st.divider()
+        
         # Botón de simulación
         simulate_button = st.button(
             "🚀 Simular Ventas",
@@ -250,17 +300,32 @@ def main():
     
     # Zona principal - Dashboard
     if simulate_button:
-        with st.spinner("⏳ Realizando predicciones recursivas..."):
+        with st.spinner("⏳ Realizando predicciones..."), timed('app.simulation'):
             # Preparar datos del producto
-            product_df = prepare_product_data(df, selected_product)
+            product_df = prepare_product_data(store, selected_product)
             
             # Hacer predicciones recursivas
             results_df = make_recursive_predictions(
-                model,
+                forecast_model,
                 product_df,
                 discount,
-                competition_scenario
+                competition_scenario,
+                strategy
             )
+            
+            # Bandas de incertidumbre con trayectorias Monte Carlo
+            bands_df, band_totals = None, None
+            residuals = cached_call('app.load_residuals', load_residuals, model) if show_uncertainty else None
+            if residuals is not None:
+                bands_df, band_totals = simulate_forecast_bands(
+                    model,
+                    product_df,
+                    residuals,
+                    n_paths=n_paths,
+                    discount_adjustment=discount,
+                    competition_scenario=competition_scenario,
+                    seed=42
+                )
         
         # Header
         st.markdown(f"<div class='main-header'>📈 Simulación de Ventas - Noviembre 2025</div>", 
@@ -327,6 +392,17 @@ def main():
             label='Predicción'
         )
         
+        # Banda P10-P90 de las trayectorias simuladas
+        if bands_df is not None:
+            ax.fill_between(
+                bands_df['dia_mes'].values,
+                bands_df['unidades_p10'].values,
+                bands_df['unidades_p90'].values,
+                color='#667eea',
+                alpha=0.2,
+                label='Banda P10-P90'
+            )
+        
         # Marcar Black Friday
         black_friday_idx = results_df[results_df['dia_mes'] == 28]
         if not black_friday_idx.empty:
@@ -360,10 +436,25 @@ def main():
                     fontsize=14, fontweight='bold', pad=20)
         ax.grid(True, alpha=0.3)
         ax.set_xticks(range(1, 31, 2))
+        if bands_df is not None:
+            ax.legend(loc='upper left')
         
         plt.tight_layout()
         st.pyplot(fig)
         
+        # Percentiles del total del mes
+        if band_totals is not None:
+            totals_row = band_totals.iloc[0]
+            col1, col2, col3 = st.columns(3)
+            for col, label in zip((col1, col2, col3), ('p10', 'p50', 'p90')):
+                with col:
+                    st.metric(
+                        f"🎲 Unidades {label.upper()}",
+                        format_units(totals_row[f'unidades_{label}']),
+                        delta=format_currency(totals_row[f'ingresos_{label}']),
+                        delta_color="off"
+                    )
+        
         st.divider()
         
         # Tabla detallada
@@ -404,7 +495,7 @@ def main():
         col1, col2, col3 = st.columns(3)
         
         # Escenario Actual
-        results_actual = make_recursive_predictions(model, product_df, discount, 'actual')
+        results_actual = make_recursive_predictions(forecast_model, product_df, discount, 'actual', strategy)
         units_actual = results_actual['prediccion_unidades'].sum()
         revenue_actual = results_actual['ingresos_proyectados'].sum()
         
@@ -414,7 +505,7 @@ def main():
             st.metric("Ingresos", format_currency(revenue_actual), delta=None)
         
         # Escenario Competencia -5%
-        results_lower = make_recursive_predictions(model, product_df, discount, 'lower')
+        results_lower = make_recursive_predictions(forecast_model, product_df, discount, 'lower', strategy)
         units_lower = results_lower['prediccion_unidades'].sum()
         revenue_lower = results_lower['ingresos_proyectados'].sum()
         units_delta_lower = units_lower - units_actual
@@ -428,7 +519,7 @@ def main():
                      delta=format_currency(revenue_delta_lower) if revenue_delta_lower != 0 else None)
         
         # Escenario Competencia +5%
-        results_higher = make_recursive_predictions(model, product_df, discount, 'higher')
+        results_higher = make_recursive_predictions(forecast_model, product_df, discount, 'higher', strategy)
         units_higher = results_higher['prediccion_unidades'].sum()
         revenue_higher = results_higher['ingresos_proyectados'].sum()
         units_delta_higher = units_higher - units_actual
@@ -443,6 +534,37 @@ def main():
         
         st.divider()
         
+        # Totales jerárquicos del catálogo completo
+        df = cached_call('app.load_inference_data', load_inference_data, store) if show_hierarchy else None
+        if df is not None:
+            st.markdown("### 🗂️ Totales por Categoría - Catálogo Completo")
+            
+            with timed('app.hierarchy'):
+                hierarchy = cached_call('app.load_hierarchy', load_hierarchy, store)
+                catalog_df = make_recursive_predictions(
+                    forecast_model, df, discount, competition_scenario, strategy
+                )
+                level_totals = aggregate_forecast_frame(
+                    catalog_df, hierarchy, levels=['total', 'categoria', 'subcategoria']
+                ).groupby(['nivel', 'nodo'], sort=False)[['prediccion_unidades', 'ingresos_proyectados']].sum()
+            
+            col1, col2 = st.columns(2)
+            for col, level, title in ((col1, 'categoria', 'Categoría'), (col2, 'subcategoria', 'Subcategoría')):
+                table = level_totals.loc[level].reset_index()
+                table.columns = [title, 'Unidades', 'Ingresos']
+                table['Unidades'] = table['Unidades'].apply(format_units)
+                table['Ingresos'] = table['Ingresos'].apply(format_currency)
+                with col:
+                    st.dataframe(table, use_container_width=True, hide_index=True)
+            
+            total_row = level_totals.loc['total'].iloc[0]
+            st.caption(
+                f"Total catálogo: {format_units(total_row['prediccion_unidades'])} unidades · "
+                f"{format_currency(total_row['ingresos_proyectados'])}"
+            )
+            
+            st.divider()
+        
         # Información adicional
         st.markdown("### ℹ️ Información de la Simulación")
         col1, col2 = st.columns(2)
@@ -452,6 +574,16 @@ def main():
         
         with col2:
             st.info(f"✅ **Escenario competencia:** {competition}")
+        
+        strategy_display = "Directa (horizonte como feature)" if strategy == 'direct' else "Recursiva (lags día a día)"
+        st.caption(f"Estrategia de predicción: {strategy_display}")
+
+def main():
+    """Renderiza la app midiendo el tiempo de cada rerun."""
+    with timed('app.render'):
+        render_app()
+    count('reruns', stage='app.render')
+    export_metrics()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
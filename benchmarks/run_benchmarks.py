@@ -0,0 +1,273 @@
+"""
+Suite de benchmarks sobre un catálogo sintético a escala de producción.
+
+Mide carga de datos, ingeniería de features, entrenamiento, predicción
+recursiva y comparativa de escenarios. Cada ejecución se añade a un
+histórico JSON Lines y se compara con las ejecuciones anteriores de la
+misma escala para detectar regresiones.
+
+Uso:
+    python benchmarks/run_benchmarks.py --products 10000 --years 5
+    python benchmarks/run_benchmarks.py --products 500 --years 2 --fail-on-regression
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+
+# Añadir el directorio padre al path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.data_processing import load_data
+from src.data_store import ensure_data_store, read_data_store
+from src.features import (
+    build_model_features,
+    create_lagged_features,
+    create_rolling_features,
+    create_temporal_features,
+    get_model_feature_columns,
+)
+from src.forecasting import make_recursive_forecast
+from src import models
+from src.synthetic import generate_dataset, write_dataset
+from src.utils import metrics
+
+DEFAULT_HISTORY_PATH = Path(__file__).resolve().parent / "results" / "history.jsonl"
+SCENARIOS = ['actual', 'lower', 'higher']
+
+
+def _model_factories():
+    """Factorías de src/models.py disponibles para el benchmark de entrenamiento."""
+    return {
+        'linear': models.create_linear_model,
+        'random_forest': models.create_random_forest,
+        'gradient_boosting': models.create_gradient_boosting,
+        'hist_gradient_boosting': models.create_hist_gradient_boosting,
+        'xgboost': models.create_xgboost,
+    }
+
+
+def time_call(func, repeat: int = 3):
+    """
+    Ejecuta una función varias veces y mide su duración.
+
+    Args:
+        func: Función sin argumentos
+        repeat: Número de repeticiones
+
+    Returns:
+        Tupla con el resultado de la última ejecución y la lista de tiempos en segundos
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def run_suite(args, data_dir: Path) -> list:
+    """
+    Genera los datos sintéticos y ejecuta todos los benchmarks.
+
+    Args:
+        args: Argumentos de línea de comandos
+        data_dir: Directorio donde escribir los CSV sintéticos
+
+    Returns:
+        Lista de resultados (nombre, filas, tiempos)
+    """
+    results = []
+
+    def record(name, func, rows, repeat=args.repeat):
+        output, timings = time_call(func, repeat)
+        if callable(rows):
+            # Filas que dependen del resultado (p. ej. lecturas filtradas)
+            rows = rows(output)
+        results.append({
+            'benchmark': name,
+            'rows': int(rows),
+            'min_s': min(timings),
+            'median_s': statistics.median(timings),
+        })
+        print(f"{name:<35} {rows:>12,} filas  min={min(timings):8.3f}s  mediana={statistics.median(timings):8.3f}s")
+        return output
+
+    print(f"Generando catálogo sintético: {args.products:,} productos × {args.years} años...")
+    datasets, generation_timings = time_call(
+        lambda: generate_dataset(n_products=args.products, n_years=args.years, seed=args.seed), repeat=1
+    )
+    print(f"Datos generados en {generation_timings[0]:.1f}s")
+
+    paths = write_dataset(datasets, data_dir)
+
+    # Carga de datos
+    ventas = record('carga_ventas', lambda: load_data(str(paths['ventas'])), len(datasets['ventas']))
+    competencia = record('carga_competencia', lambda: load_data(str(paths['competencia'])),
+                         len(datasets['competencia']))
+
+    def load_inference():
+        df = pd.read_csv(str(paths['inferencia_transformado']))
+        df['fecha'] = pd.to_datetime(df['fecha'])
+        return df
+
+    inference_df = record('carga_inferencia_procesada', load_inference, len(datasets['inferencia_transformado']))
+
+    # Almacén particionado: construcción y lecturas con filtros frente al CSV completo
+    store = record('almacen_construccion',
+                   lambda: ensure_data_store(paths['df'], data_dir / 'store' / 'df'), len(datasets['df']), repeat=1)
+    product_id = datasets['df']['producto_id'].iloc[0]
+    last_year = int(datasets['df']['año'].max())
+    record('csv_producto', lambda: (lambda df: df[df['producto_id'] == product_id])(pd.read_csv(str(paths['df']))),
+           len(datasets['df']))
+    record('almacen_producto', lambda: read_data_store(store, products=[product_id]), len)
+    record('almacen_ultimo_año', lambda: read_data_store(store, years=[last_year]), len)
+
+    # Ingeniería de features (src/features.py)
+    merged = ventas.merge(competencia, on=['fecha', 'producto_id'])
+    record('features_temporales', lambda: create_temporal_features(ventas, 'fecha'), len(ventas))
+    record('features_lags', lambda: create_lagged_features(ventas, 'unidades_vendidas', list(range(1, 8))),
+           len(ventas))
+    record('features_rolling', lambda: create_rolling_features(ventas, 'unidades_vendidas', [7]), len(ventas))
+    one_hot_columns = [col[:-2] for col in ('nombre_h', 'categoria_h', 'subcategoria_h')
+                       if any(c.startswith(col) for c in datasets['df'].columns)]
+    train_df = record('features_modelo', lambda: build_model_features(merged, one_hot_columns=one_hot_columns),
+                      len(merged))
+
+    # Entrenamiento (factorías de src/models.py)
+    feature_names = get_model_feature_columns(train_df)
+    train_sample = train_df.sample(n=min(args.train_rows, len(train_df)), random_state=args.seed)
+    X_train, y_train = train_sample[feature_names], train_sample['unidades_vendidas']
+
+    factories = _model_factories()
+    model = None
+    for name in args.models:
+        fitted = record(f'entrenamiento_{name}',
+                        lambda: models.fit_model(factories[name](), X_train, y_train, stage=f'train.{name}'),
+                        len(X_train), repeat=1)
+        if name == 'hist_gradient_boosting' or model is None:
+            model = fitted
+
+    # Predicción recursiva y escenarios
+    product_id = inference_df['producto_id'].iloc[0]
+    product_df = inference_df[inference_df['producto_id'] == product_id]
+
+    record('recursiva_producto', lambda: make_recursive_forecast(model, product_df), len(product_df))
+    record('recursiva_catalogo', lambda: make_recursive_forecast(model, inference_df), len(inference_df))
+    record('escenarios_producto',
+           lambda: [make_recursive_forecast(model, product_df, 0, s) for s in SCENARIOS], len(product_df) * 3)
+    record('escenarios_catalogo',
+           lambda: [make_recursive_forecast(model, inference_df, 0, s) for s in SCENARIOS], len(inference_df) * 3)
+
+    return results
+
+
+def load_history(path: Path) -> list:
+    """Lee el histórico de ejecuciones (JSON Lines)."""
+    if not path.exists():
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def find_regressions(results: list, history: list, scale: dict, threshold: float = 0.2,
+                     window: int = 5) -> list:
+    """
+    Compara los resultados con la mediana de las últimas ejecuciones de la misma escala.
+
+    Args:
+        results: Resultados de la ejecución actual
+        history: Ejecuciones anteriores
+        scale: Parámetros de escala de la ejecución actual
+        threshold: Empeoramiento relativo tolerado (0.2 = 20%)
+        window: Número de ejecuciones anteriores a considerar
+
+    Returns:
+        Lista de regresiones (benchmark, tiempo actual, referencia, variación)
+    """
+    previous = [run for run in history if run.get('scale') == scale][-window:]
+    regressions = []
+
+    for result in results:
+        baseline = [r['min_s'] for run in previous for r in run['results'] if r['benchmark'] == result['benchmark']]
+        if not baseline:
+            continue
+        reference = statistics.median(baseline)
+        change = (result['min_s'] - reference) / reference if reference > 0 else 0.0
+        if change > threshold:
+            regressions.append({
+                'benchmark': result['benchmark'],
+                'min_s': result['min_s'],
+                'referencia_s': reference,
+                'variacion': change,
+            })
+
+    return regressions
+
+
+def parse_args(argv=None):
+    """Parsea los argumentos de línea de comandos."""
+    parser = argparse.ArgumentParser(description="Benchmarks de forecasting sobre datos sintéticos")
+    parser.add_argument('--products', type=int, default=10000, help="Número de productos del catálogo")
+    parser.add_argument('--years', type=int, default=5, help="Años de histórico")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones por benchmark")
+    parser.add_argument('--train-rows', type=int, default=200000, help="Filas máximas de entrenamiento")
+    parser.add_argument('--models', type=lambda s: s.split(','), default=['linear', 'hist_gradient_boosting'],
+                        help="Factorías a entrenar, separadas por comas")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla aleatoria")
+    parser.add_argument('--data-dir', default=None, help="Directorio donde escribir los CSV sintéticos")
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY_PATH, help="Histórico de resultados")
+    parser.add_argument('--threshold', type=float, default=0.2, help="Empeoramiento tolerado (0.2 = 20%%)")
+    parser.add_argument('--window', type=int, default=5, help="Ejecuciones anteriores de referencia")
+    parser.add_argument('--fail-on-regression', action='store_true', help="Salir con código 1 si hay regresiones")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Ejecuta la suite, guarda el histórico y reporta regresiones."""
+    args = parse_args(argv)
+    if args.data_dir:
+        results = run_suite(args, Path(args.data_dir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="forecasting_bench_") as tmp_dir:
+            results = run_suite(args, Path(tmp_dir))
+
+    scale = {'products': args.products, 'years': args.years, 'train_rows': args.train_rows}
+    history = load_history(args.history)
+    regressions = find_regressions(results, history, scale, args.threshold, args.window)
+
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'scale': scale,
+        'results': results,
+        'stages': metrics.snapshot()['timings'],
+        'regressions': regressions,
+    }
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run) + '\n')
+
+    if regressions:
+        print("\n⚠️ Regresiones detectadas:")
+        for r in regressions:
+            print(f"  {r['benchmark']}: {r['min_s']:.3f}s vs {r['referencia_s']:.3f}s ({r['variacion']:+.0%})")
+    else:
+        print("\n✅ Sin regresiones respecto al histórico")
+
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
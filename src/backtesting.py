@@ -0,0 +1,201 @@
+"""
+Módulo de backtesting con origen móvil para la predicción recursiva.
+
+Cada serie del backtest es un par (fecha de corte, producto): desde el corte
+se predicen los siguientes días de forma recursiva, con los lags del primer
+día observados y los siguientes alimentados con las predicciones, igual que
+en producción. La media móvil del primer día se calcula con los lags, porque
+la de df.csv incluye las ventas del propio día. Todas las series de un bloque
+comparten cada llamada a predict y los bloques se reparten entre procesos;
+las métricas de cada proceso se suman al registro del proceso principal.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence
+from threadpoolctl import threadpool_limits
+
+from src.forecasting import (
+    LAG_COLUMNS,
+    MOVING_AVERAGE_COLUMN,
+    PRODUCT_COLUMN,
+    TARGET_COLUMN,
+    advance_recursive_state,
+    index_series_blocks,
+)
+from src.utils import count, metrics, timed_function
+
+
+# Estado de cada proceso del pool (se inicializa una vez por proceso)
+_worker_state = {}
+
+
+def _init_worker(model, values: np.ndarray, lag_values: np.ndarray, feature_names: list, horizon: int):
+    """Guarda en el proceso el modelo y las matrices compartidas del backtest."""
+    _worker_state.update(
+        model=model, values=values, lag_values=lag_values,
+        feature_names=feature_names, horizon=horizon
+    )
+
+
+def _init_pool_worker(*init_args):
+    """
+    Inicializa un proceso del pool con un solo hilo nativo (OpenMP/BLAS).
+
+    El paralelismo ya viene de los procesos: sin este límite cada uno abriría
+    tantos hilos como núcleos y se pisarían entre ellos.
+    """
+    _worker_state['thread_limits'] = threadpool_limits(limits=1)
+    _init_worker(*init_args)
+
+
+def _forecast_chunk(origins: np.ndarray) -> np.ndarray:
+    """Predice de forma recursiva todas las series de un bloque de orígenes."""
+    state = _worker_state
+    rows = origins[:, None] + np.arange(state['horizon'])[None, :]
+
+    features = state['values'][rows]
+    initial_lags = state['lag_values'][origins]
+
+    # Media móvil del primer día conocida en el corte: media de lag1..lag7
+    if MOVING_AVERAGE_COLUMN in state['feature_names']:
+        features[:, 0, state['feature_names'].index(MOVING_AVERAGE_COLUMN)] = initial_lags.mean(axis=1)
+
+    return advance_recursive_state(state['model'], features, initial_lags, state['feature_names'])
+
+
+def _forecast_chunk_in_worker(origins: np.ndarray):
+    """Predice un bloque en un proceso del pool y devuelve también sus métricas."""
+    metrics.reset()
+    units = _forecast_chunk(origins)
+    return units, metrics.snapshot()
+
+
+def find_backtest_origins(df: pd.DataFrame, horizon: int = 30, cutoffs: Optional[Sequence] = None,
+                          step: int = 1) -> np.ndarray:
+    """
+    Encuentra las filas que pueden ser origen de una ventana completa.
+
+    Args:
+        df: DataFrame ordenado con index_series_blocks
+        horizon: Días a predecir desde cada corte
+        cutoffs: Fechas de corte a usar (todas las válidas si es None)
+        step: Usar uno de cada N días como corte dentro de cada bloque
+
+    Returns:
+        Array con las filas de origen
+    """
+    _, position, block_size = index_series_blocks(df)
+    valid = (position + horizon <= block_size) & (position % max(1, step) == 0)
+
+    if cutoffs is not None:
+        valid &= df['fecha'].isin(pd.to_datetime(list(cutoffs))).to_numpy()
+
+    return np.flatnonzero(valid)
+
+
+@timed_function('backtest.run')
+def run_backtest(model, df: pd.DataFrame, horizon: int = 30, cutoffs: Optional[Sequence] = None,
+                 step: int = 1, n_jobs: Optional[int] = None, chunk_size: int = 5000) -> pd.DataFrame:
+    """
+    Ejecuta el backtest recursivo desde muchas fechas de corte y productos.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame histórico procesado (df.csv) con valores reales
+        horizon: Días a predecir desde cada corte
+        cutoffs: Fechas de corte (todas las que tengan ventana completa si es None)
+        step: Usar uno de cada N días como corte
+        n_jobs: Procesos del pool (1 = sin pool, None = todos los núcleos)
+        chunk_size: Series (corte, producto) por llamada a predict
+
+    Returns:
+        DataFrame con una fila por (corte, producto, día): real y predicción
+    """
+    df = df.copy()
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    df, _, _ = index_series_blocks(df)
+
+    feature_names = list(model.feature_names_in_)
+    origins = find_backtest_origins(df, horizon, cutoffs, step)
+    if len(origins) == 0:
+        raise ValueError("No hay fechas de corte con ventana completa para el horizonte indicado")
+
+    values = df[feature_names].to_numpy(dtype=float)
+    lag_values = df[LAG_COLUMNS].to_numpy(dtype=float)
+    chunks = [origins[i:i + chunk_size] for i in range(0, len(origins), chunk_size)]
+
+    n_jobs = os.cpu_count() if n_jobs is None else n_jobs
+    init_args = (model, values, lag_values, feature_names, horizon)
+
+    if n_jobs == 1 or len(chunks) == 1:
+        _init_worker(*init_args)
+        predictions = [_forecast_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_pool_worker,
+                                 initargs=init_args) as executor:
+            predictions = []
+            for units, worker_metrics in executor.map(_forecast_chunk_in_worker, chunks):
+                predictions.append(units)
+                metrics.merge(worker_metrics)
+
+    count('series_processed', len(origins), stage='backtest.run')
+
+    rows = (origins[:, None] + np.arange(horizon)[None, :]).ravel()
+    results = df.loc[rows, [PRODUCT_COLUMN, 'nombre', 'fecha', 'dia_mes']].reset_index(drop=True)
+    results.insert(2, 'corte', np.repeat(df['fecha'].to_numpy()[origins], horizon))
+    results['horizonte'] = np.tile(np.arange(1, horizon + 1), len(origins))
+    results['real'] = df[TARGET_COLUMN].to_numpy(dtype=float)[rows]
+    results['prediccion'] = np.concatenate(predictions).ravel()
+
+    return results
+
+
+def _error_metrics(group: pd.DataFrame) -> pd.Series:
+    """MAE, MSE, RMSE y R2 de un grupo de predicciones."""
+    error = group['real'] - group['prediccion']
+    mse = np.mean(error ** 2)
+    total = np.sum((group['real'] - group['real'].mean()) ** 2)
+    return pd.Series({
+        'MAE': np.mean(np.abs(error)),
+        'MSE': mse,
+        'RMSE': np.sqrt(mse),
+        'R2': 1 - np.sum(error ** 2) / total if total > 0 else np.nan,
+        'n': len(group),
+    })
+
+
+def backtest_error_tables(results: pd.DataFrame, period_length: int = 10) -> dict:
+    """
+    Resume los errores del backtest por horizonte, producto y periodo.
+
+    Los periodos agrupan horizontes en tramos de period_length días
+    (1-10, 11-20, 21-30), como el análisis de degradación del notebook.
+
+    Args:
+        results: DataFrame devuelto por run_backtest
+        period_length: Días por periodo
+
+    Returns:
+        Diccionario con las tablas 'horizonte', 'producto', 'periodo' y 'producto_periodo'
+    """
+    results = results.copy()
+    start = (results['horizonte'] - 1) // period_length * period_length + 1
+    end = np.minimum(start + period_length - 1, results['horizonte'].max())
+    results['periodo'] = start.astype(str) + '-' + end.astype(str)
+
+    tables = {
+        'horizonte': results.groupby('horizonte').apply(_error_metrics, include_groups=False),
+        'producto': results.groupby('nombre').apply(_error_metrics, include_groups=False),
+        'periodo': results.groupby('periodo', sort=False).apply(_error_metrics, include_groups=False),
+        'producto_periodo': results.groupby(['nombre', 'periodo'], sort=False).apply(
+            _error_metrics, include_groups=False
+        ),
+    }
+    tables = {name: table.reset_index() for name, table in tables.items()}
+    for table in tables.values():
+        table['n'] = table['n'].astype(int)
+    return tables
@@ -6,7 +6,10 @@ import pandas as pd
 import numpy as np
 from typing import Tuple
 
+from src.utils import count, timed_function
 
+
+@timed_function('load.csv')
 def load_data(filepath: str) -> pd.DataFrame:
     """
     Carga datos desde un archivo CSV.
@@ -17,7 +20,9 @@ def load_data(filepath: str) -> pd.DataFrame:
     Returns:
         DataFrame cargado
     """
-    return pd.read_csv(filepath)
+    df = pd.read_csv(filepath)
+    count('rows_processed', len(df), stage='load.csv')
+    return df
 
 
 def handle_missing_values(df: pd.DataFrame, strategy: str = 'mean') -> pd.DataFrame:
@@ -0,0 +1,384 @@
+"""
+Módulo de almacenamiento columnar particionado de los datos procesados.
+
+Los CSV procesados (df.csv, inferencia_df_transformado.csv) se reescriben como
+un almacén con una partición por año y, dentro de cada año, las filas
+ordenadas por producto y fecha, de modo que cada producto ocupa un rango
+contiguo de filas. Cada columna es un archivo .npy que se abre con mmap:
+
+    almacen/
+        metadata.json          columnas, tipos, categorías de texto y productos
+        index.csv              año, producto → rango de filas [inicio, fin) y fechas
+        año=2024/col_0000.npy  una columna por archivo
+
+Las lecturas aplican los filtros antes de tocar los datos: los predicados de
+año, producto y fechas se resuelven sobre el índice, solo se abren las
+columnas pedidas y de cada columna solo se leen los rangos seleccionados.
+
+Si el almacén no se puede escribir (p. ej. un despliegue de solo lectura),
+ensure_data_store puede devolver un almacén en memoria con el mismo índice y
+la misma interfaz de lectura, construido a partir del CSV.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import numpy as np
+from typing import NamedTuple, Optional, Sequence, Tuple, Union
+
+from src.utils import count, setup_logger, timed, timed_function
+
+logger = setup_logger(__name__)
+
+
+METADATA_FILE = 'metadata.json'
+INDEX_FILE = 'index.csv'
+PARTITION_COLUMN = 'año'
+PRODUCT_COLUMN = 'producto_id'
+NAME_COLUMN = 'nombre'
+DATE_COLUMN = 'fecha'
+
+
+class DataStore(NamedTuple):
+    """
+    Almacén abierto: ruta, metadatos e índice producto → rango de filas.
+
+    Los almacenes en memoria no tienen ruta y guardan las filas en frame; sus
+    rangos del índice son posiciones en frame en lugar de en la partición.
+    """
+    path: Optional[Path]
+    metadata: dict
+    index: pd.DataFrame
+    frame: Optional[pd.DataFrame] = None
+
+    @property
+    def columns(self) -> list:
+        """Columnas del almacén en el orden original."""
+        return list(self.metadata['columns'])
+
+    @property
+    def n_rows(self) -> int:
+        """Número total de filas."""
+        return int(self.metadata['n_rows'])
+
+
+def _partition_dir(path: Path, year) -> Path:
+    """Directorio de la partición de un año."""
+    return path / f'{PARTITION_COLUMN}={int(year)}'
+
+
+def _encode_column(values: pd.Series, spec: dict) -> np.ndarray:
+    """Convierte una columna a un array .npy (el texto se guarda como códigos)."""
+    if 'categories' in spec:
+        values = values.astype(object).where(values.isna(), values.astype(str))
+        return pd.Categorical(values, categories=spec['categories']).codes.astype(np.int32)
+    return values.to_numpy(dtype=spec['dtype'])
+
+
+def _decode_column(values: np.ndarray, spec: dict):
+    """Reconstruye una columna leída del almacén."""
+    if 'categories' in spec:
+        return pd.Categorical.from_codes(values, spec['categories']).astype(object)
+    return values
+
+
+@timed_function('store.write')
+def write_data_store(df: pd.DataFrame, store_path: Union[str, Path], source: Optional[str] = None) -> DataStore:
+    """
+    Escribe un DataFrame procesado como almacén particionado por año y producto.
+
+    Args:
+        df: DataFrame con fecha, producto_id y nombre (año se deriva de la fecha si falta)
+        store_path: Directorio del almacén (se reemplaza si existe)
+        source: Archivo de origen, para detectar cuándo hay que reconstruir
+
+    Returns:
+        Almacén abierto
+    """
+    store_path = Path(store_path)
+    df, metadata = _prepare_frame(df, source)
+
+    # Cada proceso escribe en su propio directorio temporal y lo publica al final
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(tempfile.mkdtemp(prefix=f'{store_path.name}.', suffix='.tmp', dir=store_path.parent))
+    try:
+        for year, partition in df.groupby(PARTITION_COLUMN, sort=True):
+            partition_dir = _partition_dir(tmp_path, year)
+            partition_dir.mkdir()
+            for column, spec in metadata['columns'].items():
+                np.save(partition_dir / spec['file'], _encode_column(partition[column], spec))
+
+        index = _build_index(df, global_positions=False)
+        index.to_csv(tmp_path / INDEX_FILE, index=False)
+        with open(tmp_path / METADATA_FILE, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    _publish(tmp_path, store_path)
+    count('rows_processed', len(df), stage='store.write')
+
+    return open_data_store(store_path)
+
+
+def _prepare_frame(df: pd.DataFrame, source: Optional[str] = None) -> Tuple[pd.DataFrame, dict]:
+    """Ordena las filas por año, producto y fecha y describe sus columnas."""
+    df = df.copy()
+    df[DATE_COLUMN] = pd.to_datetime(df[DATE_COLUMN])
+    if PARTITION_COLUMN not in df.columns:
+        df[PARTITION_COLUMN] = df[DATE_COLUMN].dt.year
+    df = df.sort_values([PARTITION_COLUMN, PRODUCT_COLUMN, DATE_COLUMN], kind='stable').reset_index(drop=True)
+
+    # Tipos de cada columna; el texto se codifica con un diccionario global
+    columns = {}
+    for i, column in enumerate(df.columns):
+        spec = {'file': f'col_{i:04d}.npy'}
+        dtype = df[column].dtype
+        if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+            spec['dtype'] = str(np.dtype(dtype))
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            spec['dtype'] = 'datetime64[ns]'
+        else:
+            spec['categories'] = sorted(df[column].dropna().astype(str).unique().tolist())
+        columns[column] = spec
+
+    metadata = {
+        'n_rows': len(df),
+        'columns': columns,
+        'products': {column: sorted(df[column].dropna().astype(str).unique().tolist())
+                     for column in (PRODUCT_COLUMN, NAME_COLUMN)},
+        'source': str(source) if source is not None else None,
+        'source_mtime': os.path.getmtime(source) if source is not None else None,
+    }
+    return df, metadata
+
+
+def _build_index(df: pd.DataFrame, global_positions: bool) -> pd.DataFrame:
+    """
+    Índice (año, producto) → rango de filas [inicio, fin) y fechas.
+
+    Con global_positions los rangos son posiciones en df; si no, posiciones
+    dentro de la partición del año.
+    """
+    positions = np.arange(len(df))
+    if not global_positions:
+        positions = df.groupby(PARTITION_COLUMN, sort=False).cumcount().to_numpy()
+
+    index = df[[PARTITION_COLUMN, PRODUCT_COLUMN, NAME_COLUMN, DATE_COLUMN]].assign(posicion=positions)
+    index = index.groupby([PARTITION_COLUMN, PRODUCT_COLUMN], sort=False).agg(
+        nombre=(NAME_COLUMN, 'first'),
+        inicio=('posicion', 'min'),
+        fin=('posicion', 'max'),
+        fecha_min=(DATE_COLUMN, 'min'),
+        fecha_max=(DATE_COLUMN, 'max'),
+    ).reset_index()
+    index['fin'] += 1
+    index[PARTITION_COLUMN] = index[PARTITION_COLUMN].astype(int)
+    index[PRODUCT_COLUMN] = index[PRODUCT_COLUMN].astype(str)
+    return index
+
+
+def _publish(tmp_path: Path, store_path: Path):
+    """Sustituye el almacén por el recién escrito sin pisar el de otro proceso."""
+    try:
+        if store_path.exists():
+            old_path = tmp_path.with_name(tmp_path.name + '.old')
+            store_path.rename(old_path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        tmp_path.rename(store_path)
+    except OSError:
+        # Otro proceso ha publicado a la vez un almacén del mismo origen: se conserva el suyo
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not (store_path / METADATA_FILE).exists():
+            raise
+
+
+def load_memory_store(source: Union[str, Path]) -> DataStore:
+    """
+    Construye un almacén en memoria a partir de un CSV procesado, sin escribir en disco.
+
+    Args:
+        source: CSV procesado de origen
+
+    Returns:
+        Almacén en memoria con el mismo índice e interfaz de lectura
+    """
+    with timed('load.csv'):
+        df = pd.read_csv(str(source))
+    return _memory_store(df, str(source))
+
+
+def _memory_store(df: pd.DataFrame, source: Optional[str] = None) -> DataStore:
+    """Almacén en memoria con las filas ordenadas y el índice por posiciones."""
+    df, metadata = _prepare_frame(df, source)
+    return DataStore(None, metadata, _build_index(df, global_positions=True), frame=df)
+
+
+def open_data_store(store_path: Union[str, Path]) -> DataStore:
+    """
+    Abre un almacén existente (solo lee los metadatos y el índice).
+
+    Args:
+        store_path: Directorio del almacén
+
+    Returns:
+        Almacén abierto
+    """
+    store_path = Path(store_path)
+    with open(store_path / METADATA_FILE, encoding='utf-8') as f:
+        metadata = json.load(f)
+    index = pd.read_csv(store_path / INDEX_FILE, parse_dates=['fecha_min', 'fecha_max'])
+    index[PRODUCT_COLUMN] = index[PRODUCT_COLUMN].astype(str)
+    return DataStore(store_path, metadata, index)
+
+
+def ensure_data_store(source: Union[str, Path], store_path: Union[str, Path],
+                      fallback_to_memory: bool = False) -> DataStore:
+    """
+    Abre el almacén de un CSV procesado, construyéndolo si falta o está desactualizado.
+
+    Args:
+        source: CSV procesado de origen
+        store_path: Directorio del almacén
+        fallback_to_memory: Si no se puede escribir el almacén, devolver uno
+            en memoria construido desde el CSV en lugar de fallar
+
+    Returns:
+        Almacén abierto
+    """
+    store_path = Path(store_path)
+    if (store_path / METADATA_FILE).exists():
+        store = open_data_store(store_path)
+        if store.metadata.get('source_mtime') == os.path.getmtime(source):
+            return store
+
+    with timed('load.csv'):
+        df = pd.read_csv(str(source))
+    try:
+        return write_data_store(df, store_path, source=str(source))
+    except OSError as e:
+        if not fallback_to_memory:
+            raise
+        logger.warning(f"No se pudo escribir el almacén en {store_path} ({e}); se usan los datos en memoria")
+        return _memory_store(df, str(source))
+
+
+def list_products(store: DataStore, column: str = NAME_COLUMN) -> list:
+    """
+    Devuelve los productos del almacén ordenados (se ordenan una vez al escribir).
+
+    Args:
+        store: Almacén abierto
+        column: 'nombre' o 'producto_id'
+
+    Returns:
+        Lista ordenada de valores únicos
+    """
+    return list(store.metadata['products'][column])
+
+
+def _coalesce_ranges(starts: np.ndarray, ends: np.ndarray) -> list:
+    """Une rangos de filas contiguos para leer cada tramo de una vez."""
+    order = np.argsort(starts, kind='stable')
+    ranges = []
+    for start, end in zip(starts[order], ends[order]):
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return ranges
+
+
+@timed_function('store.read')
+def read_data_store(store: DataStore, products: Optional[Sequence[str]] = None,
+                    names: Optional[Sequence[str]] = None, years: Optional[Sequence[int]] = None,
+                    columns: Optional[Sequence[str]] = None, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Lee del almacén solo las particiones, rangos de filas y columnas necesarios.
+
+    Los filtros se combinan (AND). Las filas se devuelven ordenadas por año,
+    producto y fecha, así que un producto de un año sale ordenado por fecha.
+
+    Args:
+        store: Almacén abierto
+        products: producto_id a leer (todos si es None)
+        names: Nombres de producto a leer (todos si es None)
+        years: Años a leer (todos si es None)
+        columns: Columnas a leer (todas si es None)
+        start_date: Fecha mínima (inclusive)
+        end_date: Fecha máxima (inclusive)
+
+    Returns:
+        DataFrame con las filas y columnas seleccionadas
+    """
+    columns = store.columns if columns is None else list(columns)
+    unknown = set(columns) - set(store.columns)
+    if unknown:
+        raise KeyError(f"Columnas no encontradas en el almacén: {sorted(unknown)}")
+
+    # La fecha se lee aunque no se pida si hay que filtrar por ella
+    filter_dates = start_date is not None or end_date is not None
+    read_columns = columns + [DATE_COLUMN] if filter_dates and DATE_COLUMN not in columns else columns
+
+    # Predicados sobre el índice: qué particiones y rangos de filas leer
+    index = store.index
+    selected = np.ones(len(index), dtype=bool)
+    if products is not None:
+        selected &= index[PRODUCT_COLUMN].isin([str(p) for p in products]).to_numpy()
+    if names is not None:
+        selected &= index[NAME_COLUMN].isin(names).to_numpy()
+    if years is not None:
+        selected &= index[PARTITION_COLUMN].isin(years).to_numpy()
+    if start_date is not None:
+        start_date = pd.Timestamp(start_date)
+        selected &= (index['fecha_max'] >= start_date).to_numpy()
+    if end_date is not None:
+        end_date = pd.Timestamp(end_date)
+        selected &= (index['fecha_min'] <= end_date).to_numpy()
+
+    specs = store.metadata['columns']
+    chunks = {column: [] for column in read_columns}
+    positions = []
+    n_partitions = 0
+    for year, ranges in index[selected].groupby(PARTITION_COLUMN, sort=True):
+        ranges = _coalesce_ranges(ranges['inicio'].to_numpy(), ranges['fin'].to_numpy())
+        n_partitions += 1
+
+        # Almacén en memoria: los rangos son posiciones en el DataFrame
+        if store.frame is not None:
+            positions.extend(np.arange(start, end) for start, end in ranges)
+            continue
+
+        partition_dir = _partition_dir(store.path, year)
+        for column in read_columns:
+            values = np.load(partition_dir / specs[column]['file'], mmap_mode='r')
+            chunks[column].extend(np.array(values[start:end]) for start, end in ranges)
+
+    if store.frame is not None:
+        rows = np.concatenate(positions) if positions else np.empty(0, dtype=int)
+        df = store.frame.iloc[rows][read_columns].reset_index(drop=True)
+    else:
+        data = {}
+        for column in read_columns:
+            spec = specs[column]
+            values = np.concatenate(chunks[column]) if chunks[column] else np.empty(0, dtype=spec.get('dtype', np.int32))
+            data[column] = _decode_column(values, spec)
+        df = pd.DataFrame(data, columns=read_columns)
+
+    # Filtro fila a fila de las fechas dentro de los rangos leídos
+    if filter_dates:
+        in_range = np.ones(len(df), dtype=bool)
+        if start_date is not None:
+            in_range &= (df[DATE_COLUMN] >= start_date).to_numpy()
+        if end_date is not None:
+            in_range &= (df[DATE_COLUMN] <= end_date).to_numpy()
+        df = df.loc[in_range, columns].reset_index(drop=True)
+
+    count('partitions_read', n_partitions, stage='store.read')
+    count('rows_processed', len(df), stage='store.read')
+    return df
@@ -5,7 +5,12 @@ Módulo para ingeniería de características.
 import pandas as pd
 import numpy as np
 
+from src.utils import count, setup_logger, timed_function
 
+logger = setup_logger(__name__)
+
+
+@timed_function('features.create_lagged_features')
 def create_lagged_features(df: pd.DataFrame, column: str, lags: list) -> pd.DataFrame:
     """
     Crea características con valores rezagados.
@@ -18,12 +23,14 @@ def create_lagged_features(df: pd.DataFrame, column: str, lags: list) -> pd.Data
     Returns:
         DataFrame con nuevas columnas de lag
     """
+    count('rows_processed', len(df), stage='features.create_lagged_features')
     df_lagged = df.copy()
     for lag in lags:
         df_lagged[f'{column}_lag_{lag}'] = df[column].shift(lag)
     return df_lagged.dropna()
 
 
+@timed_function('features.create_rolling_features')
 def create_rolling_features(df: pd.DataFrame, column: str, windows: list) -> pd.DataFrame:
     """
     Crea características de media móvil.
@@ -36,6 +43,7 @@ def create_rolling_features(df: pd.DataFrame, column: str, windows: list) -> pd.
     Returns:
         DataFrame con nuevas columnas de rolling
     """
+    count('rows_processed', len(df), stage='features.create_rolling_features')
     df_rolling = df.copy()
     for window in windows:
         df_rolling[f'{column}_rolling_mean_{window}'] = df[column].rolling(window).mean()
@@ -43,6 +51,7 @@ def create_rolling_features(df: pd.DataFrame, column: str, windows: list) -> pd.
     return df_rolling.dropna()
 
 
+@timed_function('features.create_temporal_features')
 def create_temporal_features(df: pd.DataFrame, date_column: str = None) -> pd.DataFrame:
     """
     Crea características temporales (hora, día, mes, año, etc.).
@@ -54,6 +63,7 @@ def create_temporal_features(df: pd.DataFrame, date_column: str = None) -> pd.Da
     Returns:
         DataFrame con características temporales
     """
+    count('rows_processed', len(df), stage='features.create_temporal_features')
     df_temporal = df.copy()
     
     if date_column is not None:
@@ -70,3 +80,122 @@ def create_temporal_features(df: pd.DataFrame, date_column: str = None) -> pd.Da
     df_temporal['dayofyear'] = date_series.dt.dayofyear
     
     return df_temporal
+
+
+COMPETITOR_COLUMNS = ['Amazon', 'Decathlon', 'Deporvillage']
+
+
+def _black_friday_mask(fecha: pd.Series) -> pd.Series:
+    """Black Friday: cuarto viernes de noviembre (día 22 a 28)."""
+    return (fecha.dt.month == 11) & (fecha.dt.dayofweek == 4) & fecha.dt.day.between(22, 28)
+
+
+@timed_function('features.build_model_features')
+def build_model_features(df: pd.DataFrame, lags: int = 7, media_window: int = 7,
+                         one_hot_columns: list = None) -> pd.DataFrame:
+    """
+    Construye las features del notebook de entrenamiento de forma vectorizada.
+    
+    Genera variables de calendario, lags y media móvil de unidades vendidas,
+    descuento, precio y ratio de competencia y one-hot encoding, con las
+    mismas columnas que df.csv.
+    
+    Diferencia deliberada con el notebook: allí los lags se agrupan solo por
+    año sobre filas ordenadas por fecha, de modo que el lag de una fila es la
+    venta de otro producto. Aquí se agrupan por producto y año, que es lo que
+    asume la predicción recursiva. Por eso se descartan los 7 primeros días de
+    cada producto y año: con la ventana del 25 de octubre al 30 de noviembre,
+    las filas empiezan el 1 de noviembre, mientras que el df.csv real conserva
+    casi todo el 25-31 de octubre.
+    
+    Args:
+        df: DataFrame de ventas unido con los precios de competencia
+        lags: Número de lags de unidades vendidas
+        media_window: Ventana de la media móvil
+        one_hot_columns: Columnas a codificar (default: nombre, categoria, subcategoria)
+    
+    Returns:
+        DataFrame con el esquema de df.csv
+    """
+    if one_hot_columns is None:
+        one_hot_columns = ['nombre', 'categoria', 'subcategoria']
+    
+    count('rows_processed', len(df), stage='features.build_model_features')
+    df = df.copy()
+    df['fecha'] = pd.to_datetime(df['fecha'])
+    fecha = df['fecha']
+    
+    # Variables temporales y de calendario
+    df['año'] = fecha.dt.year
+    df['mes'] = fecha.dt.month
+    df['mes_nombre'] = fecha.dt.month_name()
+    df['dia_mes'] = fecha.dt.day
+    df['dia_semana'] = fecha.dt.dayofweek
+    df['nombre_dia_semana'] = fecha.dt.day_name()
+    df['semana_año'] = fecha.dt.isocalendar().week.astype(int)
+    df['trimestre'] = fecha.dt.quarter
+    df['dia_semana_num'] = df['dia_semana']
+    df['es_fin_semana'] = df['dia_semana'].isin([5, 6])
+    
+    try:
+        import holidays
+        es_holidays = holidays.Spain(years=df['año'].unique().tolist())
+        festivos = pd.to_datetime(list(es_holidays.keys()))
+        semana_santa = pd.to_datetime([d for d in es_holidays if 'Santo' in es_holidays[d]])
+    except ImportError:
+        logger.warning("El paquete 'holidays' no está instalado: es_festivo y es_semana_santa serán False")
+        festivos = semana_santa = pd.DatetimeIndex([])
+    
+    df['es_festivo'] = fecha.isin(festivos)
+    df['es_black_friday'] = _black_friday_mask(fecha)
+    df['es_cyber_monday'] = (fecha.dt.dayofweek == 0) & _black_friday_mask(fecha - pd.Timedelta(days=3))
+    df['es_navidad'] = (fecha.dt.month == 12) & (fecha.dt.day == 25)
+    df['es_ano_nuevo'] = (fecha.dt.month == 1) & (fecha.dt.day == 1)
+    df['es_reyes'] = (fecha.dt.month == 1) & (fecha.dt.day == 6)
+    df['es_semana_santa'] = fecha.isin(semana_santa)
+    df['es_primer_dia_mes'] = df['dia_mes'] == 1
+    df['es_ultimo_dia_mes'] = fecha.dt.is_month_end
+    
+    # Lags y media móvil por producto y año
+    df = df.sort_values(['año', 'fecha', 'producto_id']).reset_index(drop=True)
+    grupo = df.groupby(['producto_id', 'año'], sort=False)['unidades_vendidas']
+    for lag in range(1, lags + 1):
+        df[f'unidades_vendidas_lag{lag}'] = grupo.shift(lag)
+    df[f'unidades_vendidas_media_movil_{media_window}d'] = (
+        grupo.rolling(media_window).mean().droplevel([0, 1])
+    )
+    df = df.dropna(subset=[f'unidades_vendidas_lag{lag}' for lag in range(1, lags + 1)]
+                   + [f'unidades_vendidas_media_movil_{media_window}d'])
+    
+    # Variables de precio
+    df['descuento_porcentaje'] = ((df['precio_venta'] - df['precio_base']) / df['precio_base']) * 100
+    df['precio_competencia'] = df[COMPETITOR_COLUMNS].mean(axis=1)
+    df['ratio_precio'] = df['precio_venta'] / df['precio_competencia']
+    df = df.drop(columns=COMPETITOR_COLUMNS)
+    
+    # One-hot encoding sobre copias con sufijo _h
+    for column in one_hot_columns:
+        df[f'{column}_h'] = df[column]
+    df = pd.get_dummies(df, columns=[f'{column}_h' for column in one_hot_columns])
+    
+    return df.reset_index(drop=True)
+
+
+def get_model_feature_columns(df: pd.DataFrame, target: str = 'unidades_vendidas',
+                              exclude: list = None) -> list:
+    """
+    Selecciona las columnas de entrada del modelo (numéricas y booleanas).
+    
+    Args:
+        df: DataFrame procesado
+        target: Variable objetivo
+        exclude: Columnas a excluir (default: fecha e ingresos)
+    
+    Returns:
+        Lista de columnas predictoras
+    """
+    if exclude is None:
+        exclude = ['fecha', 'ingresos']
+    
+    candidates = df.select_dtypes(include=['number', 'bool']).columns
+    return [col for col in candidates if col not in exclude + [target]]
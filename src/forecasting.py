@@ -0,0 +1,629 @@
+"""
+Módulo de predicción recursiva, directa y simulación Monte Carlo de trayectorias.
+
+La predicción recursiva avanza día a día: la predicción de cada día alimenta
+los lags (lag1..lag7) y la media móvil de 7 días del día siguiente. Aquí el
+estado se representa como una matriz (filas × features) que se avanza de una
+sola vez para todos los productos y trayectorias, en lugar de iterar fila a
+fila sobre un DataFrame.
+
+La predicción directa usa un único modelo con el horizonte como feature y los
+lags congelados en el origen, de modo que todos los días de todos los
+productos se predicen en una sola llamada.
+"""
+
+import time
+
+import pandas as pd
+import numpy as np
+from typing import Callable, Optional, Sequence, Tuple, Union
+
+from src.utils import count, timed, timed_function
+
+
+TARGET_COLUMN = 'unidades_vendidas'
+LAG_COLUMNS = [f'unidades_vendidas_lag{lag}' for lag in range(1, 8)]
+MOVING_AVERAGE_COLUMN = 'unidades_vendidas_media_movil_7d'
+MOVING_AVERAGE_WINDOW = 7
+PRODUCT_COLUMN = 'producto_id'
+HORIZON_COLUMN = 'horizonte'
+ORIGIN_COLUMNS = LAG_COLUMNS + [MOVING_AVERAGE_COLUMN]
+FORECAST_STRATEGIES = ('recursive', 'direct')
+
+# Factores sobre el precio de la competencia para cada escenario
+COMPETITION_FACTORS = {
+    'actual': 1.0,
+    'lower': 0.95,
+    'higher': 1.05,
+}
+
+
+def apply_price_scenario(df: pd.DataFrame, discount_adjustment=0,
+                         competition_scenario: str = 'actual') -> pd.DataFrame:
+    """
+    Aplica un ajuste de descuento y un escenario de competencia a los precios.
+
+    Args:
+        df: DataFrame con precio_base y precio_competencia
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50),
+            escalar o array con un valor por fila
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+
+    Returns:
+        Copia del DataFrame con precios y variables de precio recalculadas
+    """
+    df = df.copy()
+
+    df['precio_venta'] = df['precio_base'] * (1 + np.asarray(discount_adjustment) / 100)
+    df['precio_competencia'] = (
+        df['precio_competencia'] * COMPETITION_FACTORS.get(competition_scenario, 1.0)
+    )
+
+    df['descuento_porcentaje'] = ((df['precio_venta'] - df['precio_base']) / df['precio_base']) * 100
+    df['ratio_precio'] = df['precio_venta'] / df['precio_competencia']
+
+    return df
+
+
+def lagged_moving_average(df: pd.DataFrame) -> np.ndarray:
+    """
+    Media móvil de 7 días conocida al empezar cada día: la media de lag1..lag7.
+
+    En df.csv la columna unidades_vendidas_media_movil_7d incluye las ventas del
+    propio día, así que no puede usarse como dato de origen al evaluar o
+    entrenar sobre el histórico.
+
+    Args:
+        df: DataFrame con las columnas de lags
+
+    Returns:
+        Array con la media móvil de cada fila
+    """
+    return df[LAG_COLUMNS].to_numpy(dtype=float).mean(axis=1)
+
+
+def build_feature_tensor(df: pd.DataFrame, feature_names: Sequence[str]) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Ordena los datos por producto y fecha y los apila en un tensor de features.
+
+    Args:
+        df: DataFrame con uno o varios productos y el mismo número de días cada uno
+        feature_names: Columnas de entrada del modelo
+
+    Returns:
+        Tupla con el DataFrame ordenado, el tensor (productos, días, features)
+        y los lags iniciales (productos, 7) tomados del primer día
+    """
+    df = df.sort_values([PRODUCT_COLUMN, 'fecha']).reset_index(drop=True)
+
+    sizes = df.groupby(PRODUCT_COLUMN, sort=False).size()
+    if sizes.nunique() > 1:
+        raise ValueError("Todos los productos deben tener el mismo número de días")
+
+    n_products, horizon = len(sizes), int(sizes.iloc[0])
+    features = df[list(feature_names)].to_numpy(dtype=float).reshape(n_products, horizon, -1)
+    initial_lags = df[LAG_COLUMNS].to_numpy(dtype=float).reshape(n_products, horizon, -1)[:, 0, :]
+
+    return df, features, initial_lags
+
+
+def advance_recursive_state(model, features: np.ndarray, initial_lags: np.ndarray,
+                            feature_names: Sequence[str],
+                            noise: Optional[np.ndarray] = None,
+                            repeats: int = 1, start_day: int = 0,
+                            initial_units: Optional[np.ndarray] = None,
+                            feature_hook: Optional[Callable[[int, np.ndarray], None]] = None) -> np.ndarray:
+    """
+    Avanza la matriz de estado día a día con una sola predicción por día.
+
+    Cada fila es una serie independiente (un producto o una trayectoria de un
+    producto). El primer día usa los lags del archivo; los siguientes usan las
+    predicciones anteriores, igual que la predicción recursiva de la app.
+
+    Args:
+        model: Modelo entrenado con método predict
+        features: Tensor (series, días, features)
+        initial_lags: Lags del primer día (series, 7)
+        feature_names: Nombres de las columnas del tensor
+        noise: Perturbación opcional (series × repeats, días) sumada a cada predicción
+        repeats: Filas consecutivas que comparten cada serie del tensor; solo
+            se materializa la matriz de estado del día en curso
+        start_day: Día desde el que avanzar (reutiliza un prefijo ya calculado)
+        initial_units: Unidades de los días anteriores a start_day (filas, start_day)
+        feature_hook: Función hook(día, X) que modifica X en sitio antes de predecir
+
+    Returns:
+        Array (filas, días) con las unidades predichas (incluido el prefijo)
+    """
+    feature_names = list(feature_names)
+    n_rows, horizon = features.shape[0] * repeats, features.shape[1]
+
+    lag_positions = [(lag, feature_names.index(col)) for lag, col in enumerate(LAG_COLUMNS)
+                     if col in feature_names]
+    ma_position = feature_names.index(MOVING_AVERAGE_COLUMN) if MOVING_AVERAGE_COLUMN in feature_names else None
+
+    lags = np.repeat(np.asarray(initial_lags, dtype=float), repeats, axis=0)
+    units = np.empty((n_rows, horizon))
+
+    # Los lags al entrar en start_day son las últimas predicciones seguidas de los lags del archivo
+    if start_day > 0:
+        units[:, :start_day] = initial_units
+        lags = np.concatenate([units[:, start_day - 1::-1], lags], axis=1)[:, :len(LAG_COLUMNS)]
+
+    for day in range(start_day, horizon):
+        X = np.repeat(features[:, day, :], repeats, axis=0)
+        if day > 0:
+            for lag, position in lag_positions:
+                X[:, position] = lags[:, lag]
+            if ma_position is not None:
+                X[:, ma_position] = units[:, max(0, day - MOVING_AVERAGE_WINDOW):day].mean(axis=1)
+        if feature_hook is not None:
+            feature_hook(day, X)
+
+        with timed('forecast.recursive_step'):
+            pred = model.predict(pd.DataFrame(X, columns=feature_names))
+        count('predict_calls', stage='forecast.recursive_step')
+        count('rows_processed', n_rows, stage='forecast.recursive_step')
+
+        if noise is not None:
+            pred = pred + noise[:, day]
+        units[:, day] = np.maximum(0, pred)  # No permitir predicciones negativas
+
+        lags = np.concatenate([units[:, [day]], lags[:, :-1]], axis=1)
+
+    return units
+
+
+@timed_function('forecast.recursive')
+def make_recursive_forecast(model, df: pd.DataFrame, discount_adjustment=0,
+                            competition_scenario: str = 'actual', apply_scenario: bool = True) -> pd.DataFrame:
+    """
+    Realiza la predicción recursiva para uno o varios productos a la vez.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame de inferencia con uno o varios productos
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        apply_scenario: Si es False se conservan los precios del DataFrame
+            (p. ej. los históricos al evaluar) y se ignoran los dos anteriores
+
+    Returns:
+        DataFrame con prediccion_unidades e ingresos_proyectados
+    """
+    feature_names = model.feature_names_in_
+    if apply_scenario:
+        scenario_df = apply_price_scenario(df, discount_adjustment, competition_scenario)
+    else:
+        scenario_df = df.copy()
+    scenario_df, features, initial_lags = build_feature_tensor(scenario_df, feature_names)
+
+    units = advance_recursive_state(model, features, initial_lags, feature_names)
+
+    scenario_df['prediccion_unidades'] = units.ravel()
+    scenario_df['ingresos_proyectados'] = scenario_df['prediccion_unidades'] * scenario_df['precio_venta']
+
+    return scenario_df
+
+
+def compute_residuals(model, df: pd.DataFrame, target: str = TARGET_COLUMN) -> pd.Series:
+    """
+    Calcula los residuos del modelo (real - predicho) sobre datos históricos.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame con producto_id, las features del modelo y la variable objetivo
+        target: Nombre de la variable objetivo
+
+    Returns:
+        Series de residuos indexada por producto_id
+    """
+    pred = model.predict(df[model.feature_names_in_])
+    residuals = df[target].to_numpy(dtype=float) - pred
+    return pd.Series(residuals, index=pd.Index(df[PRODUCT_COLUMN], name=PRODUCT_COLUMN), name='residuo')
+
+
+@timed_function('forecast.holdout_residuals')
+def compute_holdout_residuals(model, df: pd.DataFrame, holdout_year: Optional[int] = None,
+                              target: str = TARGET_COLUMN) -> pd.Series:
+    """
+    Calcula residuos fuera de muestra reentrenando el modelo sin un año.
+
+    Los residuos del modelo sobre su propio conjunto de entrenamiento son
+    demasiado estrechos. Aquí se entrena una copia sin entrenar del modelo
+    (sklearn.base.clone) con todos los años salvo holdout_year y se evalúa
+    sobre ese año.
+
+    Args:
+        model: Modelo de referencia (se clona, no se modifica)
+        df: DataFrame histórico procesado (df.csv)
+        holdout_year: Año reservado (default: el último)
+        target: Nombre de la variable objetivo
+
+    Returns:
+        Series de residuos del año reservado indexada por producto_id
+    """
+    from sklearn.base import clone
+
+    holdout_year = int(df['año'].max()) if holdout_year is None else holdout_year
+    feature_names = list(model.feature_names_in_)
+    train = df['año'] != holdout_year
+    if not train.any() or train.all():
+        raise ValueError(f"Se necesitan datos de {holdout_year} y de otros años")
+
+    holdout_model = clone(model).fit(df.loc[train, feature_names], df.loc[train, target])
+    count('rows_processed', int(train.sum()), stage='forecast.holdout_residuals')
+    return compute_residuals(holdout_model, df[~train], target)
+
+
+def _residual_pools(residuals, product_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Concatena los residuos de cada producto en un solo array.
+
+    Los productos sin residuos propios (o residuos sin producto) usan todos.
+
+    Returns:
+        Tupla con los residuos concatenados, el inicio y el tamaño del bloque de cada producto
+    """
+    pooled = np.asarray(residuals, dtype=float)
+    if len(pooled) == 0:
+        raise ValueError("Se necesita al menos un residuo")
+    if not isinstance(residuals, pd.Series) or residuals.index.name != PRODUCT_COLUMN:
+        return pooled, np.zeros(len(product_ids), dtype=int), np.full(len(product_ids), len(pooled))
+
+    groups = {key: values.to_numpy(dtype=float) for key, values in residuals.groupby(level=0)}
+    blocks = [groups.get(product_id, pooled) for product_id in product_ids]
+    sizes = np.array([len(block) for block in blocks])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    return np.concatenate(blocks), offsets, sizes
+
+
+@timed_function('forecast.monte_carlo')
+def simulate_sample_paths(model, df: pd.DataFrame, residuals: Union[np.ndarray, pd.Series], n_paths: int = 1000,
+                          discount_adjustment=0, competition_scenario: str = 'actual',
+                          seed: Optional[int] = None,
+                          chunk_size: Optional[int] = None,
+                          product_seeds: Optional[Sequence[np.random.SeedSequence]] = None
+                          ) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Simula trayectorias recursivas perturbadas con residuos (bootstrap).
+
+    Todas las trayectorias de todos los productos se avanzan juntas. Cada
+    producto tiene su propio generador (SeedSequence derivada de la semilla)
+    que sortea su ruido bloque a bloque, de modo que el resultado no depende
+    de chunk_size, que limita cuántas trayectorias hay en memoria, ni de qué
+    otros productos se simulen a la vez.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame de inferencia con uno o varios productos
+        residuals: Residuos históricos; si es una Series indexada por
+            producto_id (compute_residuals), cada producto remuestrea los suyos
+        n_paths: Número de trayectorias por producto
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        seed: Semilla aleatoria
+        chunk_size: Máximo de trayectorias por bloque (todas si es None)
+        product_seeds: Semillas por producto, en orden de producto_id
+            (por defecto se derivan de seed)
+
+    Returns:
+        Tupla con el DataFrame del escenario y las unidades simuladas
+        (productos, trayectorias, días)
+    """
+    feature_names = model.feature_names_in_
+    scenario_df = apply_price_scenario(df, discount_adjustment, competition_scenario)
+    scenario_df, features, initial_lags = build_feature_tensor(scenario_df, feature_names)
+    n_products, horizon, _ = features.shape
+
+    product_ids = scenario_df[PRODUCT_COLUMN].to_numpy().reshape(n_products, horizon)[:, 0]
+    pool, offsets, sizes = _residual_pools(residuals, product_ids)
+    if product_seeds is None:
+        product_seeds = np.random.SeedSequence(seed).spawn(n_products)
+    if len(product_seeds) != n_products:
+        raise ValueError(f"Se esperaban {n_products} semillas de producto, se recibieron {len(product_seeds)}")
+    generators = [np.random.default_rng(s) for s in product_seeds]
+
+    chunk_size = n_paths if chunk_size is None else max(1, int(chunk_size))
+    paths = np.empty((n_products, n_paths, horizon))
+
+    for start in range(0, n_paths, chunk_size):
+        stop = min(start + chunk_size, n_paths)
+        size = stop - start
+
+        # Índices uniformes dentro del bloque de residuos de cada producto
+        uniform = np.stack([g.random((size, horizon)) for g in generators])
+        draws = offsets[:, None, None] + (uniform * sizes[:, None, None]).astype(int)
+        chunk_noise = pool[draws].reshape(n_products * size, horizon)
+
+        units = advance_recursive_state(
+            model, features, initial_lags, feature_names, noise=chunk_noise, repeats=size
+        )
+        paths[:, start:stop] = units.reshape(n_products, size, horizon)
+
+    return scenario_df, paths
+
+
+def summarize_sample_paths(scenario_df: pd.DataFrame, paths: np.ndarray,
+                           quantiles: Sequence[float] = (0.1, 0.5, 0.9)) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Resume las trayectorias simuladas en bandas de percentiles.
+
+    Args:
+        scenario_df: DataFrame del escenario devuelto por simulate_sample_paths
+        paths: Unidades simuladas (productos, trayectorias, días)
+        quantiles: Percentiles a calcular (default: P10, P50, P90)
+
+    Returns:
+        Tupla con las bandas diarias y las bandas del total del horizonte
+        por producto, para unidades e ingresos
+    """
+    n_products, _, horizon = paths.shape
+    prices = scenario_df['precio_venta'].to_numpy(dtype=float).reshape(n_products, 1, horizon)
+    revenue = paths * prices
+
+    daily = scenario_df[[PRODUCT_COLUMN, 'nombre', 'fecha', 'dia_mes', 'precio_venta']].copy()
+    totals = scenario_df.groupby(PRODUCT_COLUMN, sort=False)['nombre'].first().reset_index()
+
+    for q in quantiles:
+        label = f'p{int(round(q * 100))}'
+        daily[f'unidades_{label}'] = np.quantile(paths, q, axis=1).ravel()
+        daily[f'ingresos_{label}'] = np.quantile(revenue, q, axis=1).ravel()
+        totals[f'unidades_{label}'] = np.quantile(paths.sum(axis=2), q, axis=1)
+        totals[f'ingresos_{label}'] = np.quantile(revenue.sum(axis=2), q, axis=1)
+
+    return daily, totals
+
+
+def simulate_forecast_bands(model, df: pd.DataFrame, residuals: Union[np.ndarray, pd.Series], n_paths: int = 1000,
+                            discount_adjustment=0, competition_scenario: str = 'actual',
+                            quantiles: Sequence[float] = (0.1, 0.5, 0.9),
+                            seed: Optional[int] = None,
+                            chunk_size: Optional[int] = None,
+                            product_chunk_size: Optional[int] = 200) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Simula trayectorias y devuelve directamente las bandas de percentiles.
+
+    Las bandas de cada producto son independientes, así que los productos se
+    simulan y resumen por bloques: solo las trayectorias de un bloque están en
+    memoria a la vez, sea cual sea el tamaño del catálogo.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame de inferencia con uno o varios productos
+        residuals: Residuos históricos del modelo (globales o por producto)
+        n_paths: Número de trayectorias por producto
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        quantiles: Percentiles a calcular
+        seed: Semilla aleatoria
+        chunk_size: Máximo de trayectorias por bloque
+        product_chunk_size: Máximo de productos por bloque (todos si es None)
+
+    Returns:
+        Tupla con las bandas diarias y las bandas del total por producto
+    """
+    product_ids = np.sort(df[PRODUCT_COLUMN].unique())
+    product_seeds = np.random.SeedSequence(seed).spawn(len(product_ids))
+    block_size = len(product_ids) if product_chunk_size is None else max(1, int(product_chunk_size))
+
+    daily_blocks, total_blocks = [], []
+    for start in range(0, len(product_ids), block_size):
+        stop = min(start + block_size, len(product_ids))
+        block_df = df[df[PRODUCT_COLUMN].isin(product_ids[start:stop])]
+        scenario_df, paths = simulate_sample_paths(
+            model, block_df, residuals, n_paths=n_paths,
+            discount_adjustment=discount_adjustment,
+            competition_scenario=competition_scenario,
+            chunk_size=chunk_size, product_seeds=product_seeds[start:stop]
+        )
+        daily, totals = summarize_sample_paths(scenario_df, paths, quantiles)
+        daily_blocks.append(daily)
+        total_blocks.append(totals)
+
+    return (pd.concat(daily_blocks, ignore_index=True),
+            pd.concat(total_blocks, ignore_index=True))
+
+
+def index_series_blocks(df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+    """
+    Ordena el histórico en bloques contiguos (producto, año) y los indexa.
+
+    Args:
+        df: DataFrame histórico procesado
+
+    Returns:
+        Tupla con el DataFrame ordenado, la posición de cada fila dentro de su
+        bloque y el tamaño del bloque de cada fila
+    """
+    df = df.sort_values([PRODUCT_COLUMN, 'año', 'fecha']).reset_index(drop=True)
+
+    block = df.groupby([PRODUCT_COLUMN, 'año'], sort=False).ngroup().to_numpy()
+    position = df.groupby(block).cumcount().to_numpy()
+    block_size = np.bincount(block)[block]
+
+    return df, position, block_size
+
+
+def build_direct_training_set(df: pd.DataFrame, feature_names: Sequence[str], max_horizon: int = 30,
+                              origin_stride: int = 1) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Construye el dataset de entrenamiento de la estrategia directa.
+
+    Para cada origen (producto, año, día) y cada horizonte h, las features son
+    las del día objetivo con los lags y la media móvil tomados del día de
+    origen, más la columna horizonte. Así el modelo nunca necesita
+    predicciones previas. La media móvil de origen se calcula con los lags
+    (lagged_moving_average) porque la de df.csv incluye el valor objetivo.
+
+    Args:
+        df: DataFrame histórico procesado (df.csv)
+        feature_names: Columnas de entrada (sin la columna horizonte)
+        max_horizon: Horizonte máximo en días
+        origin_stride: Usar uno de cada N días como origen (reduce el tamaño)
+
+    Returns:
+        Tupla con la matriz de features y la variable objetivo
+    """
+    feature_names = list(feature_names)
+    df, position, block_size = index_series_blocks(df)
+
+    values = df[feature_names].to_numpy(dtype=float)
+    origin_df = df[ORIGIN_COLUMNS].assign(**{MOVING_AVERAGE_COLUMN: lagged_moving_average(df)})
+    origin_values = origin_df[[col for col in ORIGIN_COLUMNS if col in feature_names]].to_numpy(dtype=float)
+    origin_positions = [feature_names.index(col) for col in ORIGIN_COLUMNS if col in feature_names]
+    target = df[TARGET_COLUMN].to_numpy(dtype=float)
+
+    origins = np.flatnonzero(position % max(1, origin_stride) == 0)
+    X_parts, y_parts = [], []
+
+    for horizon in range(1, max_horizon + 1):
+        valid = origins[position[origins] + horizon - 1 < block_size[origins]]
+        rows = valid + horizon - 1
+
+        X = values[rows].copy()
+        X[:, origin_positions] = origin_values[valid]
+        X_parts.append(np.column_stack([X, np.full(len(rows), horizon)]))
+        y_parts.append(target[rows])
+
+    X = pd.DataFrame(np.vstack(X_parts), columns=feature_names + [HORIZON_COLUMN])
+    y = pd.Series(np.concatenate(y_parts), name=TARGET_COLUMN)
+
+    return X, y
+
+
+@timed_function('train.direct_model')
+def train_direct_model(df: pd.DataFrame, feature_names: Sequence[str], model=None,
+                       max_horizon: int = 30, origin_stride: int = 1):
+    """
+    Entrena el modelo de la estrategia directa (horizonte como feature).
+
+    Args:
+        df: DataFrame histórico procesado (df.csv)
+        feature_names: Columnas de entrada del modelo recursivo
+        model: Modelo sin entrenar (HistGradientBoosting por defecto)
+        max_horizon: Horizonte máximo en días
+        origin_stride: Usar uno de cada N días como origen
+
+    Returns:
+        Modelo entrenado
+    """
+    from src.models import create_hist_gradient_boosting, fit_model
+
+    if model is None:
+        model = create_hist_gradient_boosting()
+
+    X, y = build_direct_training_set(df, feature_names, max_horizon, origin_stride)
+    return fit_model(model, X, y, stage='train.direct_model.fit')
+
+
+@timed_function('forecast.direct')
+def make_direct_forecast(model, df: pd.DataFrame, discount_adjustment=0,
+                         competition_scenario: str = 'actual', apply_scenario: bool = True) -> pd.DataFrame:
+    """
+    Realiza la predicción directa: todos los días y productos en una llamada.
+
+    La media móvil de origen se recalcula con lagged_moving_average, como en
+    el entrenamiento; la columna del DataFrame se ignora.
+
+    Args:
+        model: Modelo entrenado con train_direct_model
+        df: DataFrame de inferencia con uno o varios productos
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        apply_scenario: Si es False se conservan los precios del DataFrame
+
+    Returns:
+        DataFrame con prediccion_unidades e ingresos_proyectados
+    """
+    feature_names = [col for col in model.feature_names_in_ if col != HORIZON_COLUMN]
+    if apply_scenario:
+        scenario_df = apply_price_scenario(df, discount_adjustment, competition_scenario)
+    else:
+        scenario_df = df.copy()
+    scenario_df, features, initial_lags = build_feature_tensor(scenario_df, feature_names)
+    n_products, horizon, _ = features.shape
+
+    # Media móvil de origen solo con los lags, igual que en build_direct_training_set
+    if MOVING_AVERAGE_COLUMN in feature_names:
+        features[:, 0, feature_names.index(MOVING_AVERAGE_COLUMN)] = initial_lags.mean(axis=1)
+
+    # Congelar lags y media móvil en el día de origen
+    origin_positions = [feature_names.index(col) for col in ORIGIN_COLUMNS if col in feature_names]
+    features[:, :, origin_positions] = features[:, [0], :][:, :, origin_positions]
+
+    X = np.concatenate(
+        [features, np.broadcast_to(np.arange(1, horizon + 1, dtype=float)[None, :, None], (n_products, horizon, 1))],
+        axis=2
+    ).reshape(n_products * horizon, -1)
+
+    pred = model.predict(pd.DataFrame(X, columns=list(model.feature_names_in_)))
+    count('predict_calls', stage='forecast.direct')
+    count('rows_processed', len(X), stage='forecast.direct')
+    scenario_df['prediccion_unidades'] = np.maximum(0, pred)
+    scenario_df['ingresos_proyectados'] = scenario_df['prediccion_unidades'] * scenario_df['precio_venta']
+
+    return scenario_df
+
+
+def make_forecast(model, df: pd.DataFrame, discount_adjustment=0, competition_scenario: str = 'actual',
+                  strategy: str = 'recursive', apply_scenario: bool = True) -> pd.DataFrame:
+    """
+    Realiza la predicción con la estrategia indicada.
+
+    Args:
+        model: Modelo entrenado para la estrategia elegida
+        df: DataFrame de inferencia con uno o varios productos
+        discount_adjustment: Ajuste de descuento en porcentaje (-50 a +50)
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        strategy: 'recursive' o 'direct'
+        apply_scenario: Si es False se conservan los precios del DataFrame
+
+    Returns:
+        DataFrame con prediccion_unidades e ingresos_proyectados
+    """
+    if strategy == 'recursive':
+        return make_recursive_forecast(model, df, discount_adjustment, competition_scenario, apply_scenario)
+    elif strategy == 'direct':
+        return make_direct_forecast(model, df, discount_adjustment, competition_scenario, apply_scenario)
+    else:
+        raise ValueError(f"Estrategia desconocida: {strategy}")
+
+
+def compare_forecast_strategies(recursive_model, direct_model, df: pd.DataFrame,
+                                target: str = TARGET_COLUMN) -> pd.DataFrame:
+    """
+    Compara precisión y latencia de las estrategias recursiva y directa.
+
+    Se evalúa con los precios históricos (descuentos de Black Friday incluidos)
+    y, en ambas estrategias, con la media móvil del primer día calculada solo
+    con los lags para que no incluya las ventas reales de ese día. La
+    predicción recursiva de la app usa en cambio la columna del fichero.
+
+    Args:
+        recursive_model: Modelo de la estrategia recursiva
+        direct_model: Modelo de la estrategia directa
+        df: DataFrame con features y valores reales (p. ej. noviembre 2024)
+        target: Nombre de la variable objetivo
+
+    Returns:
+        DataFrame con MAE, RMSE y segundos por estrategia
+    """
+    df = df.copy()
+    df[MOVING_AVERAGE_COLUMN] = lagged_moving_average(df)
+
+    results = []
+    for strategy, model in (('recursive', recursive_model), ('direct', direct_model)):
+        start = time.perf_counter()
+        forecast_df = make_forecast(model, df, strategy=strategy, apply_scenario=False)
+        elapsed = time.perf_counter() - start
+
+        error = forecast_df[target].to_numpy(dtype=float) - forecast_df['prediccion_unidades'].to_numpy()
+        results.append({
+            'estrategia': strategy,
+            'MAE': np.mean(np.abs(error)),
+            'RMSE': np.sqrt(np.mean(error ** 2)),
+            'segundos': elapsed,
+        })
+
+    return pd.DataFrame(results)
@@ -0,0 +1,214 @@
+"""
+Módulo de agregación jerárquica y reconciliación de predicciones.
+
+La jerarquía es total → categoria → subcategoria → producto. Se representa con
+una matriz de suma dispersa S (nodos × productos): cualquier matriz de
+predicciones por producto se agrega a todos los niveles con un solo producto
+S @ Y, y las predicciones base de cada nivel se reconcilian para que sumen.
+"""
+
+import pandas as pd
+import numpy as np
+from scipy import sparse
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+from src.utils import timed_function
+
+
+HIERARCHY_LEVELS = ['total', 'categoria', 'subcategoria', 'producto_id']
+RECONCILIATION_METHODS = ('bottom_up', 'ols', 'wls_struct', 'wls_var')
+
+
+class Hierarchy(NamedTuple):
+    """Matriz de suma y descripción de los nodos de la jerarquía."""
+    summing_matrix: sparse.csr_matrix
+    nodes: pd.DataFrame
+    bottom_ids: np.ndarray
+
+    @property
+    def n_aggregates(self) -> int:
+        """Número de nodos agregados (todos salvo los productos)."""
+        return self.summing_matrix.shape[0] - self.summing_matrix.shape[1]
+
+
+@timed_function('hierarchy.build')
+def build_hierarchy(df: pd.DataFrame) -> Hierarchy:
+    """
+    Construye la matriz de suma dispersa a partir de las columnas del catálogo.
+
+    Los nodos se ordenan por nivel: total, categorías, subcategorías y
+    productos (en orden de producto_id). Las filas de productos forman la
+    identidad al final de S.
+
+    Args:
+        df: DataFrame con producto_id, subcategoria y categoria (admite filas repetidas)
+
+    Returns:
+        Jerarquía con la matriz S (nodos × productos), los nodos y los productos
+    """
+    catalog = (df[['producto_id', 'subcategoria', 'categoria']]
+               .drop_duplicates()
+               .sort_values('producto_id')
+               .reset_index(drop=True))
+
+    if catalog['producto_id'].duplicated().any():
+        raise ValueError("Cada producto debe pertenecer a una sola subcategoría y categoría")
+    if catalog.groupby('subcategoria')['categoria'].nunique().gt(1).any():
+        raise ValueError("Cada subcategoría debe pertenecer a una sola categoría")
+
+    n_bottom = len(catalog)
+    bottom = np.arange(n_bottom)
+    blocks, node_frames = [], []
+
+    # Nivel total
+    blocks.append(sparse.csr_matrix(np.ones((1, n_bottom))))
+    node_frames.append(pd.DataFrame({'nivel': ['total'], 'nodo': ['Total']}))
+
+    # Niveles intermedios
+    for level in ['categoria', 'subcategoria']:
+        codes, labels = pd.factorize(catalog[level], sort=True)
+        blocks.append(sparse.csr_matrix(
+            (np.ones(n_bottom), (codes, bottom)), shape=(len(labels), n_bottom)
+        ))
+        node_frames.append(pd.DataFrame({'nivel': level, 'nodo': labels.astype(str)}))
+
+    # Nivel de producto
+    blocks.append(sparse.identity(n_bottom, format='csr'))
+    node_frames.append(pd.DataFrame({'nivel': 'producto_id', 'nodo': catalog['producto_id'].astype(str)}))
+
+    summing_matrix = sparse.vstack(blocks, format='csr')
+    nodes = pd.concat(node_frames, ignore_index=True)
+
+    return Hierarchy(summing_matrix, nodes, catalog['producto_id'].to_numpy())
+
+
+def bottom_level_matrix(forecast_df: pd.DataFrame, hierarchy: Hierarchy,
+                        value_column: str = 'prediccion_unidades') -> Tuple[np.ndarray, pd.DatetimeIndex]:
+    """
+    Convierte predicciones en formato largo a una matriz (productos × fechas).
+
+    Args:
+        forecast_df: DataFrame con producto_id, fecha y la columna de valores
+        hierarchy: Jerarquía construida con build_hierarchy
+        value_column: Columna a agregar
+
+    Returns:
+        Tupla con la matriz en el orden de los productos de la jerarquía y las fechas
+    """
+    matrix = forecast_df.pivot_table(
+        index='producto_id', columns='fecha', values=value_column, aggfunc='sum'
+    )
+    matrix = matrix.reindex(hierarchy.bottom_ids).fillna(0)
+    return matrix.to_numpy(dtype=float), pd.DatetimeIndex(matrix.columns)
+
+
+def aggregate_forecasts(hierarchy: Hierarchy, bottom_values: np.ndarray) -> np.ndarray:
+    """
+    Agrega predicciones por producto a todos los niveles con un producto disperso.
+
+    Args:
+        hierarchy: Jerarquía construida con build_hierarchy
+        bottom_values: Matriz (productos × periodos)
+
+    Returns:
+        Matriz (nodos × periodos) en el orden de hierarchy.nodes
+    """
+    return np.asarray(hierarchy.summing_matrix @ bottom_values)
+
+
+@timed_function('hierarchy.aggregate')
+def aggregate_forecast_frame(forecast_df: pd.DataFrame, hierarchy: Hierarchy,
+                             value_columns: Sequence[str] = ('prediccion_unidades', 'ingresos_proyectados'),
+                             levels: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Agrega un DataFrame de predicciones a todos los niveles de la jerarquía.
+
+    Args:
+        forecast_df: DataFrame con producto_id, fecha y columnas de valores
+        hierarchy: Jerarquía construida con build_hierarchy
+        value_columns: Columnas a agregar
+        levels: Niveles a devolver (todos si es None)
+
+    Returns:
+        DataFrame largo con nivel, nodo, fecha y una columna por valor
+    """
+    result = None
+    for column in value_columns:
+        bottom, dates = bottom_level_matrix(forecast_df, hierarchy, column)
+        aggregated = aggregate_forecasts(hierarchy, bottom)
+
+        frame = pd.DataFrame(aggregated, columns=dates)
+        frame = pd.concat([hierarchy.nodes, frame], axis=1)
+        frame = frame.melt(id_vars=['nivel', 'nodo'], var_name='fecha', value_name=column)
+        result = frame if result is None else result.assign(**{column: frame[column].to_numpy()})
+
+    if levels is not None:
+        result = result[result['nivel'].isin(levels)]
+
+    return result.reset_index(drop=True)
+
+
+def _reconciliation_weights(hierarchy: Hierarchy, method: str, variances: Optional[np.ndarray]) -> np.ndarray:
+    """Diagonal de W (varianza de cada nodo) según el método de reconciliación."""
+    n_nodes = hierarchy.summing_matrix.shape[0]
+    if method == 'ols':
+        return np.ones(n_nodes)
+    if method == 'wls_struct':
+        return np.asarray(hierarchy.summing_matrix.sum(axis=1)).ravel()
+    if method == 'wls_var':
+        if variances is None or len(variances) != n_nodes:
+            raise ValueError("wls_var requiere una varianza por nodo")
+        return np.maximum(np.asarray(variances, dtype=float), 1e-12)
+    raise ValueError(f"Método de reconciliación desconocido: {method}")
+
+
+@timed_function('hierarchy.reconcile')
+def reconcile_forecasts(hierarchy: Hierarchy, base_forecasts: np.ndarray, method: str = 'wls_struct',
+                        variances: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Reconcilia predicciones base de todos los niveles para que sean coherentes.
+
+    - 'bottom_up': agrega las predicciones de producto e ignora el resto.
+    - 'ols', 'wls_struct', 'wls_var': estimador MinT con W diagonal
+      (identidad, número de productos por nodo o varianzas de los residuos).
+
+    MinT calcula S (S' W⁻¹ S)⁻¹ S' W⁻¹ ŷ. S' W⁻¹ S es la suma de una
+    diagonal (productos) y un término de bajo rango (nodos agregados), así que
+    se invierte con la identidad de Woodbury resolviendo solo un sistema del
+    tamaño del número de agregados. El coste es lineal en el número de productos.
+
+    Args:
+        hierarchy: Jerarquía construida con build_hierarchy
+        base_forecasts: Predicciones base (nodos × periodos o un vector por nodo)
+            en el orden de hierarchy.nodes
+        method: Método de reconciliación
+        variances: Varianza de los residuos de cada nodo (solo para 'wls_var')
+
+    Returns:
+        Predicciones coherentes con la misma forma que base_forecasts
+    """
+    base_forecasts = np.asarray(base_forecasts, dtype=float)
+    output_shape = base_forecasts.shape
+    if base_forecasts.ndim == 1:
+        base_forecasts = base_forecasts[:, None]
+
+    S = hierarchy.summing_matrix
+    n_aggregates = hierarchy.n_aggregates
+
+    if method == 'bottom_up':
+        return aggregate_forecasts(hierarchy, base_forecasts[n_aggregates:]).reshape(output_shape)
+
+    weights = _reconciliation_weights(hierarchy, method, variances)
+    precision = 1.0 / weights
+
+    # S' W⁻¹ ŷ
+    rhs = np.asarray(S.T @ (precision[:, None] * base_forecasts))
+
+    # (D + A' Λ A)⁻¹ con D = W⁻¹ de productos, A = filas agregadas, Λ = W⁻¹ de agregados
+    A = S[:n_aggregates]
+    d_inv = weights[n_aggregates:]
+    inner = sparse.diags(weights[:n_aggregates]) + A @ sparse.diags(d_inv) @ A.T
+    correction = np.linalg.solve(np.asarray(inner.todense()), np.asarray(A @ (d_inv[:, None] * rhs)))
+    bottom = d_inv[:, None] * (rhs - np.asarray(A.T @ correction))
+
+    return aggregate_forecasts(hierarchy, bottom).reshape(output_shape)
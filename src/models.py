@@ -2,10 +2,12 @@
 Módulo para definición de modelos.
 """
 
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
 import xgboost as xgb
 
+from src.utils import count, timed
+
 
 def create_linear_model():
     """Crea un modelo de regresión lineal."""
@@ -51,6 +53,30 @@ def create_gradient_boosting(n_estimators: int = 100, learning_rate: float = 0.1
     )
 
 
+def create_hist_gradient_boosting(learning_rate: float = 0.05, max_iter: int = 400, max_depth: int = 7,
+                                  l2_regularization: float = 1.0, random_state: int = 42):
+    """
+    Crea un modelo de Histogram Gradient Boosting (modelo final del proyecto).
+    
+    Args:
+        learning_rate: Tasa de aprendizaje
+        max_iter: Número de iteraciones de boosting
+        max_depth: Profundidad máxima
+        l2_regularization: Regularización L2
+        random_state: Semilla aleatoria
+    
+    Returns:
+        Modelo de Histogram Gradient Boosting
+    """
+    return HistGradientBoostingRegressor(
+        learning_rate=learning_rate,
+        max_iter=max_iter,
+        max_depth=max_depth,
+        l2_regularization=l2_regularization,
+        random_state=random_state
+    )
+
+
 def create_xgboost(n_estimators: int = 100, learning_rate: float = 0.1, max_depth: int = 6, random_state: int = 42):
     """
     Crea un modelo de XGBoost.
@@ -71,3 +97,22 @@ def create_xgboost(n_estimators: int = 100, learning_rate: float = 0.1, max_dept
         random_state=random_state,
         n_jobs=-1
     )
+
+
+def fit_model(model, X, y, stage: str = 'train.fit'):
+    """
+    Entrena un modelo registrando duración y filas en las métricas.
+    
+    Args:
+        model: Modelo sin entrenar (p. ej. de las factorías de este módulo)
+        X: Features de entrenamiento
+        y: Variable objetivo
+        stage: Nombre de la etapa en las métricas
+    
+    Returns:
+        Modelo entrenado
+    """
+    with timed(stage):
+        model.fit(X, y)
+    count('rows_processed', len(X), stage=stage)
+    return model
@@ -0,0 +1,272 @@
+"""
+Módulo de optimización de calendarios de descuento sobre la predicción recursiva.
+
+Busca, para cada producto y día, el ajuste de descuento (-50 a +50) que
+maximiza los ingresos proyectados, con restricciones de margen mínimo, número
+máximo de días de promoción y ventana de Black Friday. La búsqueda es sin
+derivadas y de grueso a fino:
+
+1. Descuento uniforme: todos los niveles de la rejilla gruesa a la vez.
+2. Búsqueda por coordenadas: día a día, varios candidatos por producto en una
+   misma llamada a predict. Como cambiar el día d no altera los días
+   anteriores, la recursión de los candidatos arranca en d reutilizando el
+   prefijo ya calculado.
+
+Los productos son independientes, así que todo el catálogo se optimiza a la vez.
+"""
+
+import time
+
+import pandas as pd
+import numpy as np
+from typing import Optional, Sequence, Tuple, Union
+
+from src.forecasting import (
+    PRODUCT_COLUMN,
+    advance_recursive_state,
+    apply_price_scenario,
+    build_feature_tensor,
+    make_recursive_forecast,
+)
+from src.utils import count, timed, timed_function
+
+
+DISCOUNT_BOUNDS = (-50, 50)
+PRICE_COLUMNS = ['precio_venta', 'descuento_porcentaje', 'ratio_precio']
+
+
+class _ScheduleEvaluator:
+    """Evalúa en lote calendarios de descuento con la predicción recursiva."""
+
+    def __init__(self, model, features: np.ndarray, initial_lags: np.ndarray, feature_names: list,
+                 base_price: np.ndarray, competitor_price: np.ndarray):
+        self.model = model
+        self.features = features
+        self.initial_lags = initial_lags
+        self.feature_names = feature_names
+        self.base_price = base_price
+        self.competitor_price = competitor_price
+        self.positions = {col: feature_names.index(col) for col in PRICE_COLUMNS if col in feature_names}
+        self.evaluations = 0
+
+    def evaluate(self, schedules: np.ndarray, start_day: int = 0,
+                 prefix_units: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predice las unidades de K calendarios por producto.
+
+        Args:
+            schedules: Descuentos (productos, K, días)
+            start_day: Primer día a recalcular
+            prefix_units: Unidades ya calculadas antes de start_day (productos, start_day)
+
+        Returns:
+            Tupla con unidades e ingresos (productos, K, días)
+        """
+        n_products, k, horizon = schedules.shape
+        rows = schedules.reshape(n_products * k, horizon)
+        base_price = np.repeat(self.base_price, k, axis=0)
+        competitor_price = np.repeat(self.competitor_price, k, axis=0)
+        prices = base_price * (1 + rows / 100)
+
+        def set_prices(day, X):
+            if 'precio_venta' in self.positions:
+                X[:, self.positions['precio_venta']] = prices[:, day]
+            if 'descuento_porcentaje' in self.positions:
+                X[:, self.positions['descuento_porcentaje']] = rows[:, day]
+            if 'ratio_precio' in self.positions:
+                X[:, self.positions['ratio_precio']] = prices[:, day] / competitor_price[:, day]
+
+        initial_units = None if prefix_units is None else np.repeat(prefix_units, k, axis=0)
+        units = advance_recursive_state(
+            self.model, self.features, self.initial_lags, self.feature_names,
+            repeats=k, start_day=start_day, initial_units=initial_units, feature_hook=set_prices
+        )
+
+        evaluated = n_products * k * (horizon - start_day)
+        self.evaluations += evaluated
+        count('model_evaluations', evaluated, stage='optimize.discount_schedule')
+
+        units = units.reshape(n_products, k, horizon)
+        return units, units * prices.reshape(n_products, k, horizon)
+
+
+def _discount_bounds(scenario_df: pd.DataFrame, n_products: int, horizon: int,
+                     unit_cost: Optional[Union[float, pd.Series]], min_margin: float,
+                     promo_window: Optional[Tuple[int, int]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Límites de descuento por producto y día y prioridad de los días de promoción."""
+    if min_margin > 0 and unit_cost is None:
+        raise ValueError("min_margin requiere unit_cost para calcular el precio mínimo")
+
+    base_price = scenario_df['precio_base'].to_numpy(dtype=float).reshape(n_products, horizon)
+    lower = np.full((n_products, horizon), float(DISCOUNT_BOUNDS[0]))
+    upper = np.full((n_products, horizon), float(DISCOUNT_BOUNDS[1]))
+
+    # Margen mínimo: precio >= coste / (1 - margen)
+    if unit_cost is not None:
+        if isinstance(unit_cost, pd.Series):
+            cost = scenario_df[PRODUCT_COLUMN].map(unit_cost).to_numpy(dtype=float).reshape(n_products, horizon)
+        else:
+            cost = base_price * float(unit_cost)
+        lower = np.maximum(lower, 100 * (cost / (1 - min_margin) / base_price - 1))
+
+    # Distancia al Black Friday de cada producto (prioridad de los días de promoción)
+    day_index = np.arange(horizon)[None, :].repeat(n_products, axis=0)
+    black_friday = scenario_df['es_black_friday'].to_numpy(dtype=bool).reshape(n_products, horizon)
+    has_black_friday = black_friday.any(axis=1)
+    bf_day = np.where(has_black_friday, black_friday.argmax(axis=1), -1)
+    offset = day_index - bf_day[:, None]
+    priority = np.where(has_black_friday[:, None], np.abs(offset), day_index)
+
+    # Fuera de la ventana de Black Friday no se permiten promociones (descuento negativo)
+    if promo_window is not None:
+        allowed = has_black_friday[:, None] & (offset >= promo_window[0]) & (offset <= promo_window[1])
+        lower = np.where(allowed, lower, np.maximum(lower, 0))
+
+    if (lower > upper).any():
+        raise ValueError("El margen mínimo no es alcanzable con un ajuste de hasta +50%")
+
+    return lower, upper, priority
+
+
+def _project(schedules: np.ndarray, lower: np.ndarray, upper: np.ndarray, priority: np.ndarray,
+             max_promo_days: Optional[int]) -> np.ndarray:
+    """Proyecta calendarios (productos, K, días) sobre las restricciones."""
+    schedules = np.clip(schedules, lower[:, None], upper[:, None])
+    if max_promo_days is None:
+        return schedules
+
+    # Conservar solo los max_promo_days días de promoción más prioritarios
+    promo = schedules < 0
+    rank = np.where(promo, priority[:, None, :], np.inf).argsort(axis=2, kind='stable').argsort(axis=2)
+    drop = promo & (rank >= max_promo_days)
+    no_promo = np.clip(0, lower, upper)[:, None, :].repeat(schedules.shape[1], axis=1)
+    return np.where(drop, no_promo, schedules)
+
+
+@timed_function('optimize.discount_schedule')
+def optimize_discount_schedule(model, df: pd.DataFrame, competition_scenario: str = 'actual',
+                               unit_cost: Optional[Union[float, pd.Series]] = None, min_margin: float = 0.0,
+                               max_promo_days: Optional[int] = None,
+                               promo_window: Optional[Tuple[int, int]] = None,
+                               coarse_step: int = 10, refine_steps: Sequence[int] = (10, 5),
+                               max_passes: int = 2, time_budget: Optional[float] = None
+                               ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Optimiza el calendario de descuentos de uno o varios productos.
+
+    Args:
+        model: Modelo entrenado
+        df: DataFrame de inferencia con uno o varios productos
+        competition_scenario: 'actual' (0%), 'lower' (-5%), 'higher' (+5%)
+        unit_cost: Coste unitario como fracción del precio base (float) o
+            Series de costes absolutos indexada por producto_id
+        min_margin: Margen mínimo sobre el precio de venta (0.2 = 20%); requiere unit_cost
+        max_promo_days: Máximo de días con descuento negativo por producto
+        promo_window: Días permitidos para promociones relativos al Black
+            Friday, p. ej. (-3, 3); sin restricción si es None
+        coarse_step: Paso de la rejilla de descuentos uniformes
+        refine_steps: Pasos de la búsqueda por coordenadas, de grueso a fino
+        max_passes: Pasadas sobre todos los días por cada paso
+        time_budget: Segundos máximos de búsqueda (la fase uniforme siempre se completa)
+
+    Returns:
+        Tupla con el plan diario (predicción con el calendario óptimo) y un
+        resumen por producto con ingresos base, optimizados y días de promoción
+    """
+    start_time = time.perf_counter()
+    feature_names = list(model.feature_names_in_)
+
+    scenario_df = apply_price_scenario(df, 0, competition_scenario)
+    scenario_df, features, initial_lags = build_feature_tensor(scenario_df, feature_names)
+    n_products, horizon, _ = features.shape
+
+    evaluator = _ScheduleEvaluator(
+        model, features, initial_lags, feature_names,
+        base_price=scenario_df['precio_base'].to_numpy(dtype=float).reshape(n_products, horizon),
+        competitor_price=scenario_df['precio_competencia'].to_numpy(dtype=float).reshape(n_products, horizon),
+    )
+    lower, upper, priority = _discount_bounds(
+        scenario_df, n_products, horizon, unit_cost, min_margin, promo_window
+    )
+
+    def is_feasible(candidates):
+        feasible = ((candidates >= lower[:, None] - 1e-9) & (candidates <= upper[:, None] + 1e-9)).all(axis=2)
+        if max_promo_days is not None:
+            feasible &= (candidates < 0).sum(axis=2) <= max_promo_days
+        return feasible
+
+    # Fase 1: descuentos uniformes en la rejilla gruesa (más el calendario sin descuento)
+    levels = np.arange(DISCOUNT_BOUNDS[0], DISCOUNT_BOUNDS[1] + 1, coarse_step, dtype=float)
+    uniform = np.broadcast_to(levels[None, :, None], (n_products, len(levels), horizon))
+    candidates = np.concatenate([
+        np.zeros((n_products, 1, horizon)),
+        _project(uniform, lower, upper, priority, max_promo_days),
+    ], axis=1)
+
+    with timed('optimize.uniform_search'):
+        units, revenue = evaluator.evaluate(candidates)
+    totals = np.where(is_feasible(candidates), revenue.sum(axis=2), -np.inf)
+    baseline_revenue = revenue[:, 0].sum(axis=1)
+
+    best = totals.argmax(axis=1)
+    pick = np.arange(n_products)
+    schedule = candidates[pick, best].copy()
+    current_units = units[pick, best].copy()
+    current_revenue = revenue[pick, best].copy()
+
+    # Fase 2: búsqueda por coordenadas reutilizando el prefijo de la recursión
+    out_of_time = False
+    for step in refine_steps:
+        offsets = step * np.array([-2, -1, 1, 2], dtype=float)
+
+        for _ in range(max_passes):
+            improved = False
+
+            for day in range(horizon):
+                if time_budget is not None and time.perf_counter() - start_time > time_budget:
+                    out_of_time = True
+                    break
+
+                candidates = np.repeat(schedule[:, None, :], len(offsets) + 1, axis=1)
+                candidates[:, 1:, day] = np.clip(
+                    schedule[:, [day]] + offsets[None, :], lower[:, [day]], upper[:, [day]]
+                )
+
+                with timed('optimize.coordinate_step'):
+                    units, revenue = evaluator.evaluate(
+                        candidates[:, 1:], start_day=day, prefix_units=current_units[:, :day]
+                    )
+                units = np.concatenate([current_units[:, None], units], axis=1)
+                revenue = np.concatenate([current_revenue[:, None], revenue], axis=1)
+
+                totals = np.where(is_feasible(candidates), revenue.sum(axis=2), -np.inf)
+                best = totals.argmax(axis=1)
+                changed = best > 0
+                if changed.any():
+                    improved = True
+                    schedule[changed] = candidates[changed, best[changed]]
+                    current_units[changed] = units[changed, best[changed]]
+                    current_revenue[changed] = revenue[changed, best[changed]]
+
+            if out_of_time or not improved:
+                break
+        if out_of_time:
+            break
+
+    # Plan final sobre los datos originales (el escenario de competencia se aplica una vez)
+    input_df = df.sort_values([PRODUCT_COLUMN, 'fecha']).reset_index(drop=True)
+    plan_df = make_recursive_forecast(model, input_df, schedule.ravel(), competition_scenario)
+
+    # El resumen usa los ingresos de la propia búsqueda, los que se han optimizado
+    summary = plan_df.groupby(PRODUCT_COLUMN, sort=False)['nombre'].first().reset_index()
+    summary['unidades_optimizadas'] = current_units.sum(axis=1)
+    summary['ingresos_optimizados'] = current_revenue.sum(axis=1)
+    summary['ingresos_base'] = baseline_revenue
+    summary['mejora_pct'] = (summary['ingresos_optimizados'] / summary['ingresos_base'] - 1) * 100
+    summary['dias_promocion'] = (schedule < 0).sum(axis=1)
+    summary['descuento_medio'] = schedule.mean(axis=1)
+    summary.attrs['evaluaciones_modelo'] = evaluator.evaluations
+    summary.attrs['segundos'] = time.perf_counter() - start_time
+    summary.attrs['presupuesto_agotado'] = out_of_time
+
+    return plan_df, summary
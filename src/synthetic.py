@@ -0,0 +1,205 @@
+"""
+Módulo para generar catálogos y datasets sintéticos a escala de producción.
+
+Los datos generados tienen el mismo esquema que ventas.csv, competencia.csv,
+ventas_2025_inferencia.csv y los datasets procesados, con estacionalidad
+semanal, subida de noviembre y picos de Black Friday y Cyber Monday.
+"""
+
+import pandas as pd
+import numpy as np
+from pathlib import Path
+from typing import Tuple
+
+from src.features import COMPETITOR_COLUMNS, build_model_features
+
+
+# Subcategorías por categoría con su precio base típico (según el histórico real)
+CATALOG_STRUCTURE = {
+    'Running': {'Zapatillas Running': 90, 'Ropa Running': 50},
+    'Outdoor': {'Bicicleta Montaña': 830, 'Mochila Trekking': 95, 'Ropa Montaña': 75,
+                'Zapatillas Trail': 130},
+    'Fitness': {'Banco Gimnasio': 175, 'Bandas Elásticas': 25, 'Esterilla Fitness': 45,
+                'Mancuernas Ajustables': 400, 'Pesa Rusa': 40, 'Pesas Casa': 55},
+    'Wellness': {'Bloque Yoga': 20, 'Cojín Yoga': 50, 'Esterilla Yoga': 130, 'Rodillera Yoga': 35},
+}
+
+# Ventana anual del histórico real: 25 de octubre a 30 de noviembre
+SEASON_START = (10, 25)
+SEASON_END = (11, 30)
+
+
+def generate_catalog(n_products: int, star_ratio: float = 0.3, seed: int = 42) -> pd.DataFrame:
+    """
+    Genera un catálogo sintético de productos.
+
+    Args:
+        n_products: Número de productos
+        star_ratio: Proporción de productos estrella
+        seed: Semilla aleatoria
+
+    Returns:
+        DataFrame con producto_id, nombre, categoria, subcategoria, precio_base y es_estrella
+    """
+    rng = np.random.default_rng(seed)
+    pairs = [(cat, sub, price) for cat, subs in CATALOG_STRUCTURE.items() for sub, price in subs.items()]
+    choice = rng.integers(0, len(pairs), n_products)
+
+    width = max(3, len(str(n_products)))
+    catalog = pd.DataFrame({
+        'producto_id': [f'PROD_{i:0{width}d}' for i in range(1, n_products + 1)],
+        'categoria': [pairs[c][0] for c in choice],
+        'subcategoria': [pairs[c][1] for c in choice],
+    })
+    base_price = np.array([pairs[c][2] for c in choice]) * rng.uniform(0.6, 1.4, n_products)
+    catalog['precio_base'] = np.maximum(5, np.round(base_price / 5) * 5).astype(int)
+    catalog['es_estrella'] = rng.random(n_products) < star_ratio
+    catalog['nombre'] = catalog['subcategoria'] + ' ' + catalog['producto_id'].str[5:]
+
+    return catalog[['producto_id', 'nombre', 'categoria', 'subcategoria', 'precio_base', 'es_estrella']]
+
+
+def _season_dates(year: int) -> pd.DatetimeIndex:
+    """Fechas de la ventana anual del histórico para un año."""
+    return pd.date_range(
+        pd.Timestamp(year=year, month=SEASON_START[0], day=SEASON_START[1]),
+        pd.Timestamp(year=year, month=SEASON_END[0], day=SEASON_END[1])
+    )
+
+
+def generate_sales(catalog: pd.DataFrame, years: list, seed: int = 42) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Genera ventas diarias y precios de competencia para un catálogo.
+
+    Args:
+        catalog: Catálogo generado con generate_catalog
+        years: Años a generar (ventana del 25 de octubre al 30 de noviembre)
+        seed: Semilla aleatoria
+
+    Returns:
+        Tupla con DataFrames de ventas y competencia (esquema de los CSV crudos)
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(np.concatenate([_season_dates(year) for year in years]))
+    n_dates, n_products = len(dates), len(catalog)
+
+    # Filas ordenadas por fecha y producto, como en los CSV originales
+    df = pd.DataFrame({
+        'fecha': np.repeat(dates, n_products),
+        'producto_id': np.tile(catalog['producto_id'].to_numpy(), n_dates),
+    })
+    df = df.merge(catalog, on='producto_id', how='left')
+    fecha = df['fecha']
+
+    # Precios: pequeñas variaciones sobre el precio base y descuentos en Black Friday
+    is_black_friday = (fecha.dt.month == 11) & (fecha.dt.dayofweek == 4) & fecha.dt.day.between(22, 28)
+    is_cyber_monday = (fecha.dt.month == 11) & (fecha.dt.dayofweek == 0) & fecha.dt.day.between(25, 31)
+    price_factor = rng.normal(0.99, 0.02, len(df)).clip(0.9, 1.03)
+    price_factor = np.where(is_black_friday | is_cyber_monday, rng.uniform(0.85, 0.95, len(df)), price_factor)
+    df['precio_venta'] = np.round(df['precio_base'] * price_factor, 2)
+
+    # Demanda: nivel por producto, efecto semanal, subida de noviembre y picos de eventos
+    level = rng.lognormal(1.0, 0.4, n_products) * np.where(catalog['es_estrella'], 2.4, 1.0)
+    level = np.tile(level, n_dates)
+    weekday_effect = np.array([0.9, 0.85, 0.9, 0.95, 1.1, 1.25, 1.05])[fecha.dt.dayofweek]
+    november_ramp = np.where(fecha.dt.month == 11, 1 + 0.01 * fecha.dt.day, 1.0)
+    event_effect = np.where(is_black_friday, rng.uniform(4, 8, len(df)), 1.0)
+    event_effect = np.where(is_cyber_monday, rng.uniform(1.5, 2.5, len(df)), event_effect)
+    elasticity = (df['precio_venta'] / df['precio_base']) ** -2.0
+
+    demand = level * weekday_effect * november_ramp * event_effect * elasticity
+    df['unidades_vendidas'] = rng.poisson(demand)
+    df['ingresos'] = np.round(df['unidades_vendidas'] * df['precio_venta'], 2)
+
+    ventas = df[['fecha', 'producto_id', 'nombre', 'categoria', 'subcategoria', 'precio_base',
+                 'es_estrella', 'unidades_vendidas', 'precio_venta', 'ingresos']].copy()
+
+    competencia = df[['fecha', 'producto_id']].copy()
+    for column, (mean, std) in zip(COMPETITOR_COLUMNS, [(0.98, 0.07), (0.91, 0.05), (0.98, 0.05)]):
+        competencia[column] = np.round(df['precio_base'] * rng.normal(mean, std, len(df)), 2)
+
+    ventas['fecha'] = ventas['fecha'].dt.strftime('%Y-%m-%d')
+    competencia['fecha'] = competencia['fecha'].dt.strftime('%Y-%m-%d')
+
+    return ventas, competencia
+
+
+def generate_dataset(n_products: int = 10000, n_years: int = 5, first_year: int = 2020,
+                     max_product_dummies: int = 100, seed: int = 42) -> dict:
+    """
+    Genera el conjunto completo de datasets sintéticos (crudos y procesados).
+
+    El año de inferencia es el siguiente al último año de entrenamiento y sus
+    unidades de noviembre quedan vacías, como en ventas_2025_inferencia.csv.
+    Con catálogos grandes el one-hot de nombre no es viable, por lo que solo se
+    genera si hay como máximo max_product_dummies productos.
+
+    Args:
+        n_products: Número de productos
+        n_years: Años de histórico de entrenamiento
+        first_year: Primer año del histórico
+        max_product_dummies: Máximo de productos para codificar nombre con one-hot
+        seed: Semilla aleatoria
+
+    Returns:
+        Diccionario con ventas, competencia, inferencia, df e inferencia_transformado
+    """
+    catalog = generate_catalog(n_products, seed=seed)
+    train_years = list(range(first_year, first_year + n_years))
+    inference_year = first_year + n_years
+
+    ventas, competencia = generate_sales(catalog, train_years, seed=seed)
+    ventas_inf, competencia_inf = generate_sales(catalog, [inference_year], seed=seed + 1)
+
+    inferencia = ventas_inf.merge(competencia_inf, on=['fecha', 'producto_id'])
+    november = pd.to_datetime(inferencia['fecha']).dt.month == 11
+    inferencia.loc[november, ['unidades_vendidas', 'ingresos']] = np.nan
+
+    one_hot_columns = ['categoria', 'subcategoria']
+    if n_products <= max_product_dummies:
+        one_hot_columns = ['nombre'] + one_hot_columns
+
+    df = build_model_features(ventas.merge(competencia, on=['fecha', 'producto_id']),
+                              one_hot_columns=one_hot_columns)
+
+    # Mismo tratamiento que el notebook de inferencia: rellenar con la media y quedarse con noviembre
+    inferencia_filled = inferencia.fillna(inferencia.mean(numeric_only=True))
+    inferencia_transformado = build_model_features(inferencia_filled, one_hot_columns=one_hot_columns)
+    inferencia_transformado = inferencia_transformado[inferencia_transformado['mes'] == 11]
+    inferencia_transformado = inferencia_transformado.reset_index(drop=True)
+
+    return {
+        'ventas': ventas,
+        'competencia': competencia,
+        'inferencia': inferencia,
+        'df': df,
+        'inferencia_transformado': inferencia_transformado,
+    }
+
+
+def write_dataset(datasets: dict, output_dir: str) -> dict:
+    """
+    Escribe los datasets sintéticos con la misma estructura que data/.
+
+    Args:
+        datasets: Diccionario devuelto por generate_dataset
+        output_dir: Directorio raíz de salida
+
+    Returns:
+        Diccionario con la ruta de cada archivo escrito
+    """
+    root = Path(output_dir)
+    inference_year = pd.to_datetime(datasets['inferencia']['fecha']).dt.year.iloc[0]
+    paths = {
+        'ventas': root / 'raw' / 'entrenamiento' / 'ventas.csv',
+        'competencia': root / 'raw' / 'entrenamiento' / 'competencia.csv',
+        'inferencia': root / 'raw' / 'inferencia' / f'ventas_{inference_year}_inferencia.csv',
+        'df': root / 'processed' / 'df.csv',
+        'inferencia_transformado': root / 'processed' / 'inferencia_df_transformado.csv',
+    }
+
+    for name, path in paths.items():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        datasets[name].to_csv(path, index=False)
+
+    return paths
@@ -2,27 +2,230 @@
 Módulo de utilidades generales.
 """
 
+import functools
+import json
 import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
 
 
 def setup_logger(name: str, level=logging.INFO):
     """
     Configura un logger con nombre específico.
-    
+
+    El handler de consola solo se añade la primera vez, de modo que llamar de
+    nuevo (p. ej. en cada rerun de Streamlit) no duplica las líneas de log.
+
     Args:
         name: Nombre del logger
         level: Nivel de logging (default: INFO)
-    
+
     Returns:
         Logger configurado
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Handler para consola
-    handler = logging.StreamHandler()
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    handler.setFormatter(formatter)
-    logger.addHandler(handler)
-    
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
     return logger
+
+
+def _label_value(value: str) -> str:
+    """Escapa un valor de etiqueta para el formato de texto de Prometheus."""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _sample_value(value: float) -> str:
+    """Formatea un valor sin perder precisión (entero si no tiene decimales)."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class MetricsRegistry:
+    """
+    Registro de métricas por etapa: tiempos y contadores.
+
+    Los tiempos acumulan número de ejecuciones, suma y máximo en segundos; los
+    contadores (filas procesadas, llamadas a predict, aciertos de caché...) se
+    incrementan por nombre y etapa. Es seguro entre hilos.
+    """
+
+    def __init__(self, namespace: str = 'forecasting'):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Vacía todas las métricas registradas."""
+        with self._lock:
+            self._timings = defaultdict(lambda: {'count': 0, 'sum': 0.0, 'max': 0.0})
+            self._counters = defaultdict(float)
+
+    def observe(self, stage: str, seconds: float):
+        """Registra una duración para una etapa."""
+        with self._lock:
+            timing = self._timings[stage]
+            timing['count'] += 1
+            timing['sum'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
+    def increment(self, name: str, value: float = 1, stage: str = ''):
+        """Incrementa un contador, opcionalmente asociado a una etapa."""
+        with self._lock:
+            self._counters[(name, stage)] += value
+
+    def get(self, name: str, stage: str = '') -> float:
+        """Devuelve el valor actual de un contador (0 si no existe)."""
+        with self._lock:
+            return self._counters.get((name, stage), 0.0)
+
+    def snapshot(self) -> dict:
+        """
+        Devuelve una copia de las métricas actuales.
+
+        Returns:
+            Diccionario con 'timings' por etapa y 'counters' por nombre y etapa
+        """
+        with self._lock:
+            return {
+                'timings': {stage: dict(values) for stage, values in self._timings.items()},
+                'counters': [
+                    {'name': name, 'stage': stage, 'value': value}
+                    for (name, stage), value in self._counters.items()
+                ],
+            }
+
+    def merge(self, snapshot: dict):
+        """
+        Suma al registro las métricas de otro registro (p. ej. de un proceso del pool).
+
+        Args:
+            snapshot: Diccionario devuelto por snapshot()
+        """
+        with self._lock:
+            for stage, timing in snapshot['timings'].items():
+                current = self._timings[stage]
+                current['count'] += timing['count']
+                current['sum'] += timing['sum']
+                current['max'] = max(current['max'], timing['max'])
+            for counter in snapshot['counters']:
+                self._counters[(counter['name'], counter['stage'])] += counter['value']
+
+    def to_prometheus(self) -> str:
+        """
+        Exporta las métricas en formato de texto de Prometheus.
+
+        Returns:
+            Texto con una métrica por línea
+        """
+        snapshot = self.snapshot()
+        prefix = self.namespace
+        lines = []
+
+        if snapshot['timings']:
+            lines.append(f'# TYPE {prefix}_stage_seconds summary')
+            for stage, timing in sorted(snapshot['timings'].items()):
+                labels = f'{{stage="{_label_value(stage)}"}}'
+                lines.append(f'{prefix}_stage_seconds_count{labels} {timing["count"]}')
+                lines.append(f'{prefix}_stage_seconds_sum{labels} {timing["sum"]:.6f}')
+            lines.append(f'# TYPE {prefix}_stage_seconds_max gauge')
+            for stage, timing in sorted(snapshot['timings'].items()):
+                lines.append(f'{prefix}_stage_seconds_max{{stage="{_label_value(stage)}"}} {timing["max"]:.6f}')
+
+        for name in sorted({counter['name'] for counter in snapshot['counters']}):
+            lines.append(f'# TYPE {prefix}_{name}_total counter')
+            for counter in snapshot['counters']:
+                if counter['name'] == name:
+                    labels = f'{{stage="{_label_value(counter["stage"])}"}}' if counter['stage'] else ''
+                    lines.append(f'{prefix}_{name}_total{labels} {_sample_value(counter["value"])}')
+
+        return '\n'.join(lines) + '\n'
+
+    def to_json_line(self) -> str:
+        """
+        Exporta las métricas como una línea JSON con marca de tiempo.
+
+        Returns:
+            Línea JSON (sin salto de línea final)
+        """
+        record = {'timestamp': datetime.now(timezone.utc).isoformat(), **self.snapshot()}
+        return json.dumps(record)
+
+    def write_json_line(self, path: str):
+        """Añade las métricas actuales como una línea al archivo indicado."""
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_json_line() + '\n')
+
+
+# Registro por defecto compartido por todo el proyecto
+metrics = MetricsRegistry()
+
+_instrumentation_logger = setup_logger('forecasting.metrics', level=logging.WARNING)
+
+
+@contextmanager
+def timed(stage: str, registry: MetricsRegistry = None, logger: logging.Logger = None):
+    """
+    Context manager que mide la duración de una etapa.
+
+    Args:
+        stage: Nombre de la etapa (p. ej. 'forecast.recursive_step')
+        registry: Registro de métricas (default: registro global)
+        logger: Logger donde escribir la duración en nivel DEBUG
+
+    Yields:
+        None
+    """
+    registry = metrics if registry is None else registry
+    logger = _instrumentation_logger if logger is None else logger
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        registry.observe(stage, elapsed)
+        logger.debug(f"{stage}: {elapsed:.4f}s")
+
+
+def timed_function(stage: str = None, registry: MetricsRegistry = None):
+    """
+    Decorador que mide la duración de cada llamada a una función.
+
+    Args:
+        stage: Nombre de la etapa (default: módulo.función)
+        registry: Registro de métricas (default: registro global)
+
+    Returns:
+        Decorador
+    """
+    def decorator(func):
+        name = stage or f'{func.__module__.split(".")[-1]}.{func.__name__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name, registry):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name: str, value: float = 1, stage: str = '', registry: MetricsRegistry = None):
+    """
+    Incrementa un contador en el registro de métricas.
+
+    Args:
+        name: Nombre del contador (p. ej. 'rows_processed', 'predict_calls')
+        value: Incremento
+        stage: Etapa asociada
+        registry: Registro de métricas (default: registro global)
+    """
+    (metrics if registry is None else registry).increment(name, value, stage)
@@ -0,0 +1,49 @@
+"""
+Fixtures compartidas: datos procesados del proyecto y un modelo pequeño.
+
+El modelo final (models/modelo_final.joblib) depende de la versión de
+scikit-learn/XGBoost con la que se guardó, así que los tests entrenan un
+HistGradientBoosting rápido sobre df.csv con las mismas features.
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from sklearn.ensemble import HistGradientBoostingRegressor
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.features import get_model_feature_columns  # noqa: E402
+
+PROCESSED_DIR = PROJECT_ROOT / "data" / "processed"
+RAW_DIR = PROJECT_ROOT / "data" / "raw"
+
+
+@pytest.fixture(scope="session")
+def train_df():
+    """Histórico procesado (df.csv)."""
+    return pd.read_csv(PROCESSED_DIR / "df.csv", parse_dates=['fecha'])
+
+
+@pytest.fixture(scope="session")
+def inference_df():
+    """Datos de inferencia de noviembre 2025."""
+    return pd.read_csv(PROCESSED_DIR / "inferencia_df_transformado.csv", parse_dates=['fecha'])
+
+
+@pytest.fixture(scope="session")
+def model(train_df, inference_df):
+    """HistGradientBoosting pequeño entrenado con las features comunes a ambos archivos."""
+    feature_names = [col for col in get_model_feature_columns(train_df) if col in inference_df.columns]
+    model = HistGradientBoostingRegressor(max_iter=60, random_state=42)
+    return model.fit(train_df[feature_names], train_df['unidades_vendidas'])
+
+
+@pytest.fixture(scope="session")
+def product_df(inference_df):
+    """Un producto de inferencia ordenado por fecha."""
+    name = sorted(inference_df['nombre'].unique())[0]
+    return inference_df[inference_df['nombre'] == name].sort_values('fecha').reset_index(drop=True)
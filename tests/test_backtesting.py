@@ -0,0 +1,47 @@
+"""
+Tests del backtesting recursivo con origen móvil.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from threadpoolctl import threadpool_info, threadpool_limits
+
+from src.backtesting import _init_pool_worker, run_backtest
+from src.utils import metrics
+
+
+def test_first_day_ignores_file_moving_average(model, train_df):
+    cutoffs = ['2024-11-01', '2024-11-10']
+    results = run_backtest(model, train_df, horizon=5, cutoffs=cutoffs, n_jobs=1)
+
+    # La media móvil de df.csv contiene el valor real del día: alterarla no debe cambiar nada
+    altered = train_df.copy()
+    altered['unidades_vendidas_media_movil_7d'] = 1e6
+    altered_results = run_backtest(model, altered, horizon=5, cutoffs=cutoffs, n_jobs=1)
+
+    np.testing.assert_array_equal(altered_results['prediccion'].to_numpy(), results['prediccion'].to_numpy())
+
+
+def test_pool_matches_sequential_and_keeps_metrics(model, train_df):
+    cutoffs = ['2023-11-01', '2024-11-01']
+    sequential = run_backtest(model, train_df, horizon=5, cutoffs=cutoffs, n_jobs=1)
+
+    before = metrics.get('predict_calls', 'forecast.recursive_step')
+    pooled = run_backtest(model, train_df, horizon=5, cutoffs=cutoffs, n_jobs=2, chunk_size=10)
+    n_chunks = int(np.ceil(len(pooled) / 5 / 10))
+
+    np.testing.assert_array_equal(pooled['prediccion'].to_numpy(), sequential['prediccion'].to_numpy())
+    assert metrics.get('predict_calls', 'forecast.recursive_step') - before == n_chunks * 5
+
+
+def test_pool_workers_use_one_native_thread(model):
+    init_args = (model, np.zeros((1, 1)), np.zeros((1, 7)), list(model.feature_names_in_), 1)
+
+    # Los procesos heredan el límite del padre: sin el inicializador verían 4 hilos
+    with threadpool_limits(limits=4):
+        with ProcessPoolExecutor(max_workers=1, initializer=_init_pool_worker, initargs=init_args) as executor:
+            pools = executor.submit(threadpool_info).result()
+
+    assert pools
+    assert all(pool['num_threads'] == 1 for pool in pools)
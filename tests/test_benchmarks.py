@@ -0,0 +1,40 @@
+"""
+Tests de la detección de regresiones de la suite de benchmarks.
+"""
+
+import importlib.util
+
+from conftest import PROJECT_ROOT
+
+spec = importlib.util.spec_from_file_location("run_benchmarks", PROJECT_ROOT / "benchmarks" / "run_benchmarks.py")
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+SCALE = {'products': 500, 'years': 2, 'train_rows': 200000}
+
+
+def make_run(scale, **timings):
+    return {'scale': scale, 'results': [{'benchmark': name, 'min_s': value} for name, value in timings.items()]}
+
+
+def test_find_regressions_flags_only_slower_runs_of_same_scale():
+    history = [
+        make_run(SCALE, carga_ventas=1.0, recursiva_catalogo=2.0),
+        make_run(SCALE, carga_ventas=1.0, recursiva_catalogo=2.0),
+        # Escala distinta: no debe usarse como referencia
+        make_run({**SCALE, 'products': 10000}, carga_ventas=10.0, recursiva_catalogo=0.1),
+    ]
+    results = make_run(SCALE, carga_ventas=1.1, recursiva_catalogo=3.0, features_lags=5.0)['results']
+
+    regressions = run_benchmarks.find_regressions(results, history, SCALE, threshold=0.2)
+
+    assert [r['benchmark'] for r in regressions] == ['recursiva_catalogo']
+    assert regressions[0]['referencia_s'] == 2.0
+    assert abs(regressions[0]['variacion'] - 0.5) < 1e-12
+
+
+def test_find_regressions_without_history_of_same_scale():
+    history = [make_run({**SCALE, 'years': 5}, carga_ventas=0.1)]
+    results = make_run(SCALE, carga_ventas=1.0)['results']
+
+    assert run_benchmarks.find_regressions(results, history, SCALE) == []
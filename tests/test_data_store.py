@@ -0,0 +1,74 @@
+"""
+Tests del almacén columnar particionado.
+"""
+
+import pandas as pd
+import pytest
+
+from src import data_store
+from src.data_store import ensure_data_store, list_products, load_memory_store, read_data_store
+from conftest import PROCESSED_DIR
+
+SOURCE = PROCESSED_DIR / "df.csv"
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory):
+    """Almacén en disco construido desde df.csv."""
+    return ensure_data_store(SOURCE, tmp_path_factory.mktemp("store") / "entrenamiento")
+
+
+def _expected(train_df, mask=None):
+    df = train_df if mask is None else train_df[mask]
+    return df.sort_values(['año', 'producto_id', 'fecha']).reset_index(drop=True)
+
+
+def test_full_read_round_trips(store, train_df):
+    pd.testing.assert_frame_equal(read_data_store(store), _expected(train_df), check_dtype=False)
+
+
+def test_product_read_matches_mask(store, train_df):
+    name = list_products(store)[3]
+    result = read_data_store(store, names=[name])
+
+    pd.testing.assert_frame_equal(result, _expected(train_df, train_df['nombre'] == name), check_dtype=False)
+    assert result['fecha'].is_monotonic_increasing
+
+
+def test_predicates_and_projection(store, train_df):
+    result = read_data_store(store, products=['PROD_002'], years=[2023], columns=['unidades_vendidas'],
+                             start_date='2023-11-10', end_date='2023-11-20')
+
+    mask = ((train_df['producto_id'] == 'PROD_002') & (train_df['fecha'] >= '2023-11-10')
+            & (train_df['fecha'] <= '2023-11-20'))
+    assert list(result.columns) == ['unidades_vendidas']
+    assert result['unidades_vendidas'].tolist() == _expected(train_df, mask)['unidades_vendidas'].tolist()
+
+
+def test_memory_store_matches_disk_store(store):
+    memory = load_memory_store(SOURCE)
+
+    assert list_products(memory) == list_products(store)
+    for kwargs in ({}, {'names': [list_products(store)[0]]}, {'years': [2022], 'columns': ['producto_id', 'fecha']}):
+        pd.testing.assert_frame_equal(read_data_store(memory, **kwargs), read_data_store(store, **kwargs),
+                                      check_dtype=False)
+
+
+def test_falls_back_to_memory_when_store_cannot_be_written(tmp_path, monkeypatch):
+    def read_only(*args, **kwargs):
+        raise PermissionError("sistema de archivos de solo lectura")
+
+    monkeypatch.setattr(data_store, 'write_data_store', read_only)
+
+    with pytest.raises(PermissionError):
+        ensure_data_store(SOURCE, tmp_path / "almacen")
+    store = ensure_data_store(SOURCE, tmp_path / "almacen", fallback_to_memory=True)
+    assert store.frame is not None and len(read_data_store(store)) == store.n_rows
+
+
+def test_rebuild_leaves_no_temporary_directories(tmp_path, train_df):
+    path = tmp_path / "almacen"
+    data_store.write_data_store(train_df, path)
+    data_store.write_data_store(train_df, path)
+
+    assert [p.name for p in tmp_path.iterdir()] == ["almacen"]
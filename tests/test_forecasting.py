@@ -0,0 +1,160 @@
+"""
+Tests de la predicción recursiva vectorizada y la simulación Monte Carlo.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.forecasting import (
+    advance_recursive_state,
+    apply_price_scenario,
+    build_direct_training_set,
+    build_feature_tensor,
+    compute_holdout_residuals,
+    lagged_moving_average,
+    make_forecast,
+    make_recursive_forecast,
+    simulate_forecast_bands,
+    simulate_sample_paths,
+)
+
+
+def row_loop_forecast(model, df, discount_adjustment, competition_scenario):
+    """Implementación original de la app (fila a fila con iterrows), como referencia."""
+    df = df.copy()
+    df['precio_venta'] = df['precio_base'] * (1 + discount_adjustment / 100)
+    if competition_scenario == 'lower':
+        df['precio_competencia'] = df['precio_competencia'] * 0.95
+    elif competition_scenario == 'higher':
+        df['precio_competencia'] = df['precio_competencia'] * 1.05
+    df['descuento_porcentaje'] = ((df['precio_venta'] - df['precio_base']) / df['precio_base']) * 100
+    df['ratio_precio'] = df['precio_venta'] / df['precio_competencia']
+
+    feature_names = model.feature_names_in_
+    predictions = []
+    for idx, row in df.iterrows():
+        if idx > 0:
+            for lag in range(7, 1, -1):
+                row[f'unidades_vendidas_lag{lag}'] = df.loc[idx - 1, f'unidades_vendidas_lag{lag - 1}']
+            row['unidades_vendidas_lag1'] = predictions[-1]
+            df.loc[idx] = row
+            df.loc[idx, 'unidades_vendidas_media_movil_7d'] = np.mean(predictions[-7:])
+        pred = max(0, model.predict(df.loc[[idx], feature_names])[0])
+        predictions.append(pred)
+
+    return np.array(predictions)
+
+
+@pytest.mark.parametrize('discount, scenario', [(0, 'actual'), (-20, 'lower'), (15, 'higher')])
+def test_recursive_forecast_matches_row_loop(model, product_df, discount, scenario):
+    expected = row_loop_forecast(model, product_df, discount, scenario)
+    result = make_recursive_forecast(model, product_df, discount, scenario)
+
+    np.testing.assert_allclose(result['prediccion_unidades'].to_numpy(), expected, rtol=0, atol=1e-9)
+
+
+def test_restart_from_prefix_matches_full_recursion(model, inference_df):
+    feature_names = list(model.feature_names_in_)
+    _, features, initial_lags = build_feature_tensor(apply_price_scenario(inference_df), feature_names)
+    full = advance_recursive_state(model, features, initial_lags, feature_names)
+
+    for start_day in (1, 6, 7, 8, 29):
+        restarted = advance_recursive_state(
+            model, features, initial_lags, feature_names,
+            start_day=start_day, initial_units=full[:, :start_day]
+        )
+        np.testing.assert_array_equal(restarted, full)
+
+
+def test_chunk_size_does_not_change_paths(model, inference_df):
+    residuals = np.linspace(-3, 3, 50)
+    df = inference_df[inference_df['producto_id'].isin(['PROD_001', 'PROD_002'])]
+
+    _, paths = simulate_sample_paths(model, df, residuals, n_paths=40, seed=7)
+    for chunk_size in (1, 7, 40):
+        _, chunked = simulate_sample_paths(model, df, residuals, n_paths=40, seed=7, chunk_size=chunk_size)
+        np.testing.assert_array_equal(chunked, paths)
+
+
+def test_product_blocks_do_not_change_bands(model, inference_df):
+    residuals = np.linspace(-3, 3, 50)
+    df = inference_df[inference_df['producto_id'].isin(['PROD_001', 'PROD_002', 'PROD_003'])]
+
+    daily, totals = simulate_forecast_bands(model, df, residuals, n_paths=30, seed=3, product_chunk_size=None)
+    for product_chunk_size in (1, 2):
+        block_daily, block_totals = simulate_forecast_bands(
+            model, df, residuals, n_paths=30, seed=3, product_chunk_size=product_chunk_size
+        )
+        pd.testing.assert_frame_equal(block_daily, daily)
+        pd.testing.assert_frame_equal(block_totals, totals)
+
+
+def test_paths_resample_residuals_per_product(model, inference_df):
+    df = inference_df[inference_df['producto_id'].isin(['PROD_001', 'PROD_002'])]
+    residuals = pd.Series(
+        [0.0, 0.0, 5.0, -5.0],
+        index=pd.Index(['PROD_001', 'PROD_001', 'PROD_002', 'PROD_002'], name='producto_id'),
+    )
+
+    scenario_df, paths = simulate_sample_paths(model, df, residuals, n_paths=20, seed=1)
+    point = make_recursive_forecast(model, df)['prediccion_unidades'].to_numpy().reshape(2, -1)
+
+    # Sin ruido propio, las trayectorias de PROD_001 coinciden con la predicción puntual
+    np.testing.assert_allclose(paths[0], np.broadcast_to(point[0], paths[0].shape))
+    assert paths[1].std(axis=0).max() > 0
+
+
+def test_holdout_residuals_exclude_training_year(model, train_df):
+    residuals = compute_holdout_residuals(model, train_df)
+
+    assert len(residuals) == (train_df['año'] == train_df['año'].max()).sum()
+    assert residuals.index.name == 'producto_id'
+    # Fuera de muestra, el error es mayor que sobre el propio entrenamiento
+    in_sample = train_df['unidades_vendidas'] - model.predict(train_df[model.feature_names_in_])
+    assert residuals.abs().mean() > in_sample.abs().mean()
+
+
+def test_forecast_can_keep_historical_prices(model, train_df):
+    history = train_df[(train_df['año'] == 2024) & (train_df['mes'] == 11)]
+
+    kept = make_forecast(model, history, strategy='recursive', apply_scenario=False)
+    scenario = make_forecast(model, history, strategy='recursive')
+
+    original = history.sort_values(['producto_id', 'fecha'])
+    np.testing.assert_array_equal(kept['precio_venta'].to_numpy(), original['precio_venta'].to_numpy())
+    np.testing.assert_array_equal(kept['descuento_porcentaje'].to_numpy(), original['descuento_porcentaje'].to_numpy())
+    assert not np.allclose(scenario['precio_venta'].to_numpy(), original['precio_venta'].to_numpy())
+
+
+def test_direct_training_origin_excludes_target(train_df, model):
+    feature_names = list(model.feature_names_in_)
+    X, y = build_direct_training_set(train_df, feature_names, max_horizon=1)
+
+    # Con horizonte 1 el objetivo es el día de origen: la media móvil no puede contenerlo
+    lags = X[[f'unidades_vendidas_lag{lag}' for lag in range(1, 8)]].to_numpy()
+    np.testing.assert_allclose(X['unidades_vendidas_media_movil_7d'].to_numpy(), lags.mean(axis=1))
+
+
+class RecordingModel:
+    """Modelo mínimo que guarda la matriz recibida en predict."""
+
+    def __init__(self, feature_names):
+        self.feature_names_in_ = np.array(feature_names, dtype=object)
+
+    def predict(self, X):
+        self.X = X
+        return np.zeros(len(X))
+
+
+def test_direct_forecast_computes_origin_moving_average(model, inference_df):
+    direct_model = RecordingModel(list(model.feature_names_in_) + ['horizonte'])
+    df = inference_df[inference_df['producto_id'].isin(['PROD_001', 'PROD_002'])]
+    df = df.assign(unidades_vendidas_media_movil_7d=df['unidades_vendidas_media_movil_7d'] + 100)
+
+    forecast_df = make_forecast(direct_model, df, strategy='direct')
+
+    # La media móvil de origen sale de los lags del primer día, no de la columna del fichero
+    origin = forecast_df.groupby('producto_id').head(1)
+    expected = np.repeat(lagged_moving_average(origin), 30)
+    np.testing.assert_allclose(direct_model.X['unidades_vendidas_media_movil_7d'].to_numpy(), expected)
@@ -0,0 +1,104 @@
+"""
+Tests de la jerarquía de productos y de la reconciliación de predicciones.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.hierarchy import aggregate_forecast_frame, build_hierarchy, reconcile_forecasts
+
+
+@pytest.fixture(scope="module")
+def hierarchy(train_df):
+    """Jerarquía del catálogo real (24 productos)."""
+    return build_hierarchy(train_df)
+
+
+@pytest.fixture(scope="module")
+def base_forecasts(hierarchy):
+    """Predicciones base incoherentes para todos los nodos (nodos × 5 periodos)."""
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 50, (hierarchy.summing_matrix.shape[0], 5))
+
+
+def dense_mint(hierarchy, base, weights):
+    """Estimador MinT con inversas densas, como referencia."""
+    S = hierarchy.summing_matrix.toarray()
+    W_inv = np.diag(1.0 / weights)
+    return S @ np.linalg.inv(S.T @ W_inv @ S) @ S.T @ W_inv @ base
+
+
+@pytest.mark.parametrize("method", ['ols', 'wls_struct', 'wls_var'])
+def test_woodbury_matches_dense_mint(hierarchy, base_forecasts, method):
+    n_nodes = hierarchy.summing_matrix.shape[0]
+    variances = np.random.default_rng(1).uniform(0.5, 5, n_nodes)
+    weights = {
+        'ols': np.ones(n_nodes),
+        'wls_struct': hierarchy.summing_matrix.toarray().sum(axis=1),
+        'wls_var': variances,
+    }[method]
+
+    reconciled = reconcile_forecasts(hierarchy, base_forecasts, method=method, variances=variances)
+
+    np.testing.assert_allclose(reconciled, dense_mint(hierarchy, base_forecasts, weights), rtol=1e-12, atol=1e-12)
+
+
+def test_bottom_up_aggregates_products(hierarchy, base_forecasts):
+    S = hierarchy.summing_matrix.toarray()
+    bottom = base_forecasts[hierarchy.n_aggregates:]
+
+    np.testing.assert_allclose(reconcile_forecasts(hierarchy, base_forecasts, method='bottom_up'), S @ bottom)
+
+
+@pytest.mark.parametrize("method", ['bottom_up', 'ols', 'wls_struct'])
+def test_reconciled_forecasts_are_coherent(hierarchy, base_forecasts, method):
+    S = hierarchy.summing_matrix.toarray()
+    n_aggregates = hierarchy.n_aggregates
+
+    reconciled = reconcile_forecasts(hierarchy, base_forecasts, method=method)
+
+    np.testing.assert_allclose(reconciled[:n_aggregates], S[:n_aggregates] @ reconciled[n_aggregates:])
+
+
+def test_reconcile_keeps_vector_shape(hierarchy, base_forecasts):
+    for method in ('bottom_up', 'wls_struct'):
+        reconciled = reconcile_forecasts(hierarchy, base_forecasts[:, 0], method=method)
+
+        assert reconciled.shape == base_forecasts[:, 0].shape
+        np.testing.assert_allclose(reconciled, reconcile_forecasts(hierarchy, base_forecasts, method=method)[:, 0])
+
+
+def test_build_hierarchy_rejects_inconsistent_catalog():
+    catalog = pd.DataFrame({
+        'producto_id': ['P1', 'P2', 'P3'],
+        'subcategoria': ['Trail', 'Trail', 'Yoga'],
+        'categoria': ['Running', 'Running', 'Fitness'],
+    })
+
+    product_in_two_subcategories = pd.concat([catalog, catalog.iloc[[0]].assign(subcategoria='Yoga')])
+    with pytest.raises(ValueError, match="subcategoría y categoría"):
+        build_hierarchy(product_in_two_subcategories)
+
+    subcategory_in_two_categories = catalog.assign(categoria=['Running', 'Montaña', 'Fitness'])
+    with pytest.raises(ValueError, match="una sola categoría"):
+        build_hierarchy(subcategory_in_two_categories)
+
+
+def test_aggregate_forecast_frame_matches_groupby(hierarchy, inference_df):
+    forecast_df = inference_df.assign(prediccion_unidades=np.arange(len(inference_df), dtype=float),
+                                      ingresos_proyectados=inference_df['precio_venta'])
+
+    aggregated = aggregate_forecast_frame(forecast_df, hierarchy)
+    aggregated['fecha'] = pd.to_datetime(aggregated['fecha'])
+
+    for level in ('categoria', 'subcategoria'):
+        expected = forecast_df.groupby([level, 'fecha'])[['prediccion_unidades', 'ingresos_proyectados']].sum()
+        actual = (aggregated[aggregated['nivel'] == level]
+                  .set_index(['nodo', 'fecha'])[['prediccion_unidades', 'ingresos_proyectados']])
+        actual.index.names = [level, 'fecha']
+        pd.testing.assert_frame_equal(actual.sort_index(), expected.sort_index(), check_dtype=False)
+
+    total = aggregated[aggregated['nivel'] == 'total'].set_index('fecha')['prediccion_unidades']
+    expected_total = forecast_df.groupby('fecha')['prediccion_unidades'].sum()
+    np.testing.assert_allclose(total.sort_index().to_numpy(), expected_total.sort_index().to_numpy())
@@ -0,0 +1,57 @@
+"""
+Tests del optimizador de calendarios de descuento.
+"""
+
+import numpy as np
+import pytest
+
+from src.optimization import optimize_discount_schedule
+
+PRODUCTS = ['PROD_001', 'PROD_003', 'PROD_009']
+
+
+@pytest.fixture(scope="module")
+def catalog_df(inference_df):
+    """Tres productos de inferencia."""
+    return inference_df[inference_df['producto_id'].isin(PRODUCTS)]
+
+
+def test_constraints_are_respected(model, catalog_df):
+    plan_df, summary = optimize_discount_schedule(
+        model, catalog_df, unit_cost=0.6, min_margin=0.2, max_promo_days=3, promo_window=(-2, 2),
+        refine_steps=(10,), max_passes=1
+    )
+
+    discount = plan_df['descuento_porcentaje']
+    assert discount.between(-25 - 1e-9, 50 + 1e-9).all()  # precio >= 0.6 / 0.8 del precio base
+
+    promo = plan_df[discount < 0]
+    assert promo.groupby('producto_id').size().max() <= 3
+    assert (summary['dias_promocion'] <= 3).all()
+
+    black_friday = plan_df.loc[plan_df['es_black_friday'], ['producto_id', 'fecha']].set_index('producto_id')['fecha']
+    offset = (promo['fecha'] - promo['producto_id'].map(black_friday)).dt.days
+    assert offset.between(-2, 2).all()
+
+
+def test_non_actual_scenario_is_applied_once(model, catalog_df):
+    plan_df, summary = optimize_discount_schedule(model, catalog_df, competition_scenario='lower',
+                                                  refine_steps=(10,), max_passes=1)
+
+    expected = catalog_df.sort_values(['producto_id', 'fecha'])['precio_competencia'].to_numpy() * 0.95
+    np.testing.assert_allclose(plan_df['precio_competencia'].to_numpy(), expected)
+
+    # El resumen describe el mismo escenario que el plan
+    plan_revenue = plan_df.groupby('producto_id', sort=False)['ingresos_proyectados'].sum().to_numpy()
+    np.testing.assert_allclose(summary['ingresos_optimizados'].to_numpy(), plan_revenue, rtol=1e-6)
+
+
+def test_optimized_revenue_is_not_below_baseline(model, catalog_df):
+    _, summary = optimize_discount_schedule(model, catalog_df, refine_steps=(10,), max_passes=1)
+
+    assert (summary['ingresos_optimizados'] >= summary['ingresos_base'] - 1e-6).all()
+
+
+def test_min_margin_requires_unit_cost(model, catalog_df):
+    with pytest.raises(ValueError, match="unit_cost"):
+        optimize_discount_schedule(model, catalog_df, min_margin=0.2)
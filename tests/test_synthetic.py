@@ -0,0 +1,53 @@
+"""
+Tests del generador de catálogos sintéticos.
+"""
+
+import pandas as pd
+import pytest
+
+from src.synthetic import generate_dataset
+from conftest import PROCESSED_DIR, RAW_DIR
+
+ONE_HOT_PREFIXES = ('nombre_h_', 'categoria_h_', 'subcategoria_h_')
+
+
+@pytest.fixture(scope="module")
+def datasets():
+    """Catálogo pequeño de dos años de histórico."""
+    return generate_dataset(n_products=30, n_years=2, first_year=2021, seed=0)
+
+
+def without_one_hot(columns):
+    # El orden de las columnas procesadas depende del notebook que las generó
+    return {col for col in columns if not col.startswith(ONE_HOT_PREFIXES)}
+
+
+@pytest.mark.parametrize("key, path", [
+    ('ventas', RAW_DIR / "entrenamiento" / "ventas.csv"),
+    ('competencia', RAW_DIR / "entrenamiento" / "competencia.csv"),
+    ('inferencia', RAW_DIR / "inferencia" / "ventas_2025_inferencia.csv"),
+    ('df', PROCESSED_DIR / "df.csv"),
+    ('inferencia_transformado', PROCESSED_DIR / "inferencia_df_transformado.csv"),
+])
+def test_schema_matches_real_files(datasets, key, path):
+    real_columns = pd.read_csv(path, nrows=0).columns
+    assert without_one_hot(datasets[key].columns) == without_one_hot(real_columns)
+
+
+def test_black_friday_spike(datasets):
+    ventas = datasets['ventas'].assign(fecha=lambda df: pd.to_datetime(df['fecha']))
+    november = ventas[ventas['fecha'].dt.month == 11]
+    is_black_friday = (november['fecha'].dt.dayofweek == 4) & november['fecha'].dt.day.between(22, 28)
+
+    daily_units = november.groupby([november['fecha'].dt.year, is_black_friday])['unidades_vendidas'].mean()
+    for year in daily_units.index.get_level_values(0).unique():
+        assert daily_units[(year, True)] > 2 * daily_units[(year, False)]
+
+
+def test_inference_november_units_are_missing(datasets):
+    inferencia = datasets['inferencia']
+    november = pd.to_datetime(inferencia['fecha']).dt.month == 11
+
+    assert inferencia.loc[november, ['unidades_vendidas', 'ingresos']].isna().all().all()
+    assert inferencia.loc[~november, 'unidades_vendidas'].notna().all()
+    assert (pd.to_datetime(inferencia['fecha']).dt.year == 2023).all()
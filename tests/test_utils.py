@@ -0,0 +1,88 @@
+"""
+Tests del logger y del registro de métricas.
+"""
+
+import json
+import uuid
+
+from src.utils import MetricsRegistry, count, setup_logger, timed, timed_function
+
+
+def test_setup_logger_does_not_duplicate_handlers():
+    name = f'test.{uuid.uuid4().hex}'
+    setup_logger(name)
+    logger = setup_logger(name)
+
+    assert len(logger.handlers) == 1
+
+
+def test_timed_records_count_sum_and_max():
+    registry = MetricsRegistry()
+    registry.observe('carga', 0.5)
+    with timed('carga', registry):
+        pass
+
+    timing = registry.snapshot()['timings']['carga']
+    assert timing['count'] == 2
+    assert 0.5 <= timing['sum'] < 1.0
+    assert timing['max'] == 0.5
+
+
+def test_timed_function_uses_module_and_function_name():
+    registry = MetricsRegistry()
+
+    @timed_function(registry=registry)
+    def step(value):
+        return value * 2
+
+    assert step(3) == 6
+    assert step(4) == 8
+
+    timing = registry.snapshot()['timings']['test_utils.step']
+    assert timing['count'] == 2
+    assert timing['max'] <= timing['sum']
+
+
+def test_merge_adds_snapshots():
+    registry, worker = MetricsRegistry(), MetricsRegistry()
+    registry.observe('paso', 1.0)
+    count('rows_processed', 10, stage='paso', registry=registry)
+    worker.observe('paso', 3.0)
+    count('rows_processed', 5, stage='paso', registry=worker)
+    count('predict_calls', stage='paso', registry=worker)
+
+    registry.merge(worker.snapshot())
+
+    assert registry.snapshot()['timings']['paso'] == {'count': 2, 'sum': 4.0, 'max': 3.0}
+    assert registry.get('rows_processed', 'paso') == 15
+    assert registry.get('predict_calls', 'paso') == 1
+
+
+def test_prometheus_output():
+    registry = MetricsRegistry(namespace='demo')
+    registry.observe('forecast', 0.25)
+    count('rows_processed', 12345678, stage='forecast', registry=registry)
+    count('cache_ratio', 0.1, registry=registry)
+    count('predict_calls', stage='a"b\\c\nd', registry=registry)
+
+    lines = registry.to_prometheus().splitlines()
+
+    assert 'demo_stage_seconds_count{stage="forecast"} 1' in lines
+    assert 'demo_stage_seconds_sum{stage="forecast"} 0.250000' in lines
+    assert 'demo_stage_seconds_max{stage="forecast"} 0.250000' in lines
+    assert '# TYPE demo_rows_processed_total counter' in lines
+    assert 'demo_rows_processed_total{stage="forecast"} 12345678' in lines
+    assert 'demo_cache_ratio_total 0.1' in lines
+    assert 'demo_predict_calls_total{stage="a\\"b\\\\c\\nd"} 1' in lines
+
+
+def test_json_line_output():
+    registry = MetricsRegistry()
+    registry.observe('forecast', 0.25)
+    count('rows_processed', 12345678, stage='forecast', registry=registry)
+
+    record = json.loads(registry.to_json_line())
+
+    assert 'timestamp' in record
+    assert record['timings'] == {'forecast': {'count': 1, 'sum': 0.25, 'max': 0.25}}
+    assert record['counters'] == [{'name': 'rows_processed', 'stage': 'forecast', 'value': 12345678}]